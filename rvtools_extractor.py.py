@@ -10,25 +10,139 @@ Usage:
     python rvtools_extractor.py <path_to_rvtools_zip> [--all] [--comprehensive]
 
 Requirements:
-    pip install pandas chardet
+    pip install pandas
+    pip install pyarrow  (optional, faster CSV parsing)
 """
 
 import zipfile
 import pandas as pd
 import sys
 import os
+import io
+import re
+import codecs
 from pathlib import Path
 from datetime import datetime
 import argparse
-import chardet
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Text that pd.read_csv reads as missing by default, given to the PyArrow reader so both agree
+NA_VALUES = ('', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null')
+
+# Worker processes for reading CSVs when PyArrow is installed (each read is multi-threaded already)
+ARROW_MAX_WORKERS = 4
+
+# Copy-on-Write (always on from pandas 3.0) makes derived frames share data until written,
+# so no defensive .copy() calls are needed
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def detect_encoding(head):
+    """Detect file encoding from the byte order mark in its first bytes (UTF-8 if there is none)"""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return 'utf-8'
+
+
+def read_csv_file(zip_ref, member, encoding):
+    """Read a semicolon-delimited RVTools CSV straight from the ZIP, using PyArrow when available"""
+    if PYARROW_AVAILABLE:
+        try:
+            with zip_ref.open(member) as f:
+                if (encoding or '').lower().replace('_', '-') in ('utf-8', 'utf-8-sig', 'ascii'):
+                    data = f.read()
+                else:
+                    # PyArrow parses UTF-8 only, so recode other encodings in memory
+                    data = io.TextIOWrapper(f, encoding=encoding).read().encode('utf-8')
+            
+            def read(column_types=None):
+                # Treat the same strings as missing as pd.read_csv does, in text columns too
+                return pacsv.read_csv(io.BytesIO(data),
+                                      read_options=pacsv.ReadOptions(block_size=1 << 20),
+                                      parse_options=pacsv.ParseOptions(delimiter=';'),
+                                      convert_options=pacsv.ConvertOptions(column_types=column_types,
+                                                                           null_values=NA_VALUES,
+                                                                           strings_can_be_null=True))
+            
+            table = read()
+            
+            # PyArrow returns raw bytes for text that is not valid UTF-8
+            if any(pa.types.is_binary(field.type) for field in table.schema):
+                raise UnicodeDecodeError('utf-8', b'', 0, 1, 'invalid UTF-8 data')
+            
+            # Keep date/time columns as their original text, like pandas does. Casting the parsed
+            # values back to string would reformat them, so read those columns again as strings
+            temporal = [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+            if temporal:
+                table = read(dict.fromkeys(temporal, pa.string()))
+            return table.to_pandas()
+        except pa.ArrowException:
+            # Fall through to the more lenient pandas parser
+            pass
+    
+    with zip_ref.open(member) as f:
+        return pd.read_csv(io.TextIOWrapper(f, encoding=encoding),
+                           delimiter=';',
+                           low_memory=False)
+
+
+def _read_one_csv(zip_path, member):
+    """Read a single CSV file from the ZIP (runs in a worker process)
+    
+    Returns a (filename, dataframe, error) tuple; dataframe is None on error.
+    """
+    filename = os.path.basename(member).lower()
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            with zip_ref.open(member) as f:
+                encoding = detect_encoding(f.read(4))
+            try:
+                df = read_csv_file(zip_ref, member, encoding)
+            except UnicodeDecodeError:
+                # No BOM and not valid UTF-8: assume a Windows-1252 export
+                df = read_csv_file(zip_ref, member, 'cp1252')
+        df.columns = df.columns.str.strip()
+        return filename, df, None
+    except Exception as e:
+        return filename, None, str(e)
+
+
+def concat_unique(values):
+    """Join the distinct non-null values of a group with ' | '"""
+    return ' | '.join(values.dropna().astype(str).unique())
+
+
+def concat_unique_by_group(df, key_col, value_col):
+    """Vectorized concat_unique of value_col for every group of key_col"""
+    # Deduplicate (key, value) pairs first so the Python-level join only sees distinct values
+    pairs = df[[key_col, value_col]].dropna().drop_duplicates()
+    return pairs[value_col].astype(str).groupby(pairs[key_col], sort=False, observed=True).agg(' | '.join)
 
 
 class RVToolsComprehensiveExtractor:
+    # Words in a numeric column name that mean "sum per VM" (other numeric columns are averaged)
+    SUM_HINTS = frozenset({'size', 'capacity', 'mib', 'gb', 'mb', 'count', 'num'})
+    
+    # Text columns that keep their first value per VM instead of joining unique values
+    FIRST_COLS = frozenset({'vm', 'name', 'powerstate', 'os', 'cluster', 'host', 'datacenter'})
+    
     def __init__(self, zip_path, include_all=False, comprehensive_output=False):
         self.zip_path = zip_path
         self.include_all = include_all
         self.comprehensive_output = comprehensive_output  # New option for full data output
+        self._column_roles = None  # Summary columns (cpus/memory/disk/power), set by filter_output_columns
         
         # Define which files contain VM-level data that should be joined by VM UUID
         self.vm_data_files = {
@@ -48,26 +162,25 @@ class RVToolsComprehensiveExtractor:
             'fileinfo': 'tabvfileinfo'
         }
         
+        # Single alternation over all file patterns, so categorizing a file is one regex search
+        self._file_regex = re.compile('|'.join(re.escape(pattern) for pattern in self.vm_data_files.values()))
+        self._pattern_to_key = {pattern: key for key, pattern in self.vm_data_files.items()}
+        
         # Define aggregation rules for fields that can have multiple records per VM
         self.aggregation_rules = {
-            # Disk aggregations (now in GB after conversion)
-            'Capacity MiB': 'sum',
-            'In Use MiB': 'sum',
-            'Free MiB': 'sum',
-            'Provisioned MiB': 'sum',
-            'VMDK Size MiB': 'sum',
-            'Size MiB': 'sum',
-            
-            # Memory aggregations (will be converted to GB)
-            'Size MiB': 'sum',
+            # Disk and memory aggregations (MiB columns are converted to GB at load time)
+            'Capacity GB': 'sum',
+            'In Use GB': 'sum',
+            'Free GB': 'sum',
+            'Provisioned GB': 'sum',
+            'VMDK Size GB': 'sum',
+            'Size GB': 'sum',
             
             # Network aggregations
             'Speed Mbps': 'sum',
             
-            # Partition aggregations (MB will be converted to GB)
-            'Capacity MB': 'sum',
-            'Consumed MB': 'sum',
-            'Free MB': 'sum',
+            # Partition aggregations (MB columns are converted to GB at load time)
+            'Consumed GB': 'sum',
             
             # Count-based aggregations
             'Num Disks': 'sum',
@@ -75,85 +188,79 @@ class RVToolsComprehensiveExtractor:
             'Num Snapshots': 'count',
             
             # String concatenations (for non-numeric fields with multiple values)
-            'Network': lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 0 else '',
-            'MAC Address': lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 0 else '',
-            'IP Address': lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 0 else '',
-            'Disk Path': lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 0 else '',
-            'Datastore': lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 0 else ''
+            'Network': concat_unique,
+            'MAC Address': concat_unique,
+            'IP Address': concat_unique,
+            'Disk Path': concat_unique,
+            'Datastore': concat_unique
         }
         
-    def detect_encoding(self, file_path):
-        """Detect file encoding"""
-        try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(10000)
-                result = chardet.detect(raw_data)
-                return result['encoding'] if result['confidence'] > 0.7 else 'cp1252'
-        except:
-            return 'cp1252'
-    
     def extract_and_read_all_csvs(self):
-        """Extract ZIP and read ALL CSV files that contain VM UUID"""
-        extract_dir = f"temp_rvtools_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
+        """Read ALL CSV files in the ZIP that contain VM UUID (without extracting to disk)"""
         try:
-            # Extract ZIP
+            # Find all CSV files in the ZIP
             with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
+                csv_members = [info.filename for info in zip_ref.infolist()
+                               if not info.is_dir() and info.filename.lower().endswith('.csv')]
             
-            # Find and read all CSV files
             csv_data = {}
             all_files = []
             skipped_files = []
             
-            for root, dirs, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith('.csv'):
-                        filepath = os.path.join(root, file)
-                        filename = os.path.basename(file).lower()
-                        all_files.append(filename)
-                        
-                        print(f"Reading: {filename}")
-                        
-                        try:
-                            encoding = self.detect_encoding(filepath)
-                            df = pd.read_csv(filepath, 
-                                           delimiter=';',
-                                           encoding=encoding,
-                                           low_memory=False)
-                            df.columns = df.columns.str.strip()
-                            
-                            # Check if file contains VM UUID column
-                            if 'VM UUID' not in df.columns:
-                                print(f"  -> Skipped: No 'VM UUID' column found")
-                                skipped_files.append(filename)
-                                continue
-                            
-                            # Skip completely empty files
-                            if len(df) == 0:
-                                print(f"  -> Skipped: Empty file")
-                                skipped_files.append(filename)
-                                continue
-                            
-                            # Categorize the file based on filename
-                            file_key = None
-                            for key, pattern in self.vm_data_files.items():
-                                if pattern in filename:
-                                    file_key = key
-                                    break
-                            
-                            if file_key:
-                                csv_data[file_key] = df
-                                print(f"  -> Categorized as: {file_key} ({len(df)} rows)")
-                            else:
-                                # Store with filename as key for uncategorized files
-                                clean_name = filename.replace('rvtools_', '').replace('.csv', '')
-                                csv_data[clean_name] = df
-                                print(f"  -> Stored as: {clean_name} ({len(df)} rows)")
-                                
-                        except Exception as e:
-                            print(f"  -> Error reading {filename}: {e}")
-                            skipped_files.append(filename)
+            # Parse files in parallel, then categorize them here in the parent process.
+            # PyArrow already parses each file on its own thread pool, so fewer processes are needed
+            max_workers = min(len(csv_members), os.cpu_count() or 1)
+            if PYARROW_AVAILABLE:
+                max_workers = min(max_workers, ARROW_MAX_WORKERS)
+            
+            if max_workers > 1:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(_read_one_csv, repeat(self.zip_path), csv_members))
+            else:
+                # Not worth starting (and pickling results back from) a worker process
+                results = [_read_one_csv(self.zip_path, member) for member in csv_members]
+            
+            for filename, df, error in results:
+                all_files.append(filename)
+                
+                print(f"Reading: {filename}")
+                
+                if error is not None:
+                    print(f"  -> Error reading {filename}: {error}")
+                    skipped_files.append(filename)
+                    continue
+                
+                # Check if file contains VM UUID column
+                if 'VM UUID' not in df.columns:
+                    print(f"  -> Skipped: No 'VM UUID' column found")
+                    skipped_files.append(filename)
+                    continue
+                
+                # Skip completely empty files
+                if len(df) == 0:
+                    print(f"  -> Skipped: Empty file")
+                    skipped_files.append(filename)
+                    continue
+                
+                # Convert MiB/MB columns to GB once, before any aggregation
+                df = self.convert_mib_to_gb(df)
+                
+                # Power state has a handful of distinct values; store it as a categorical
+                if 'Powerstate' in df.columns:
+                    df['Powerstate'] = df['Powerstate'].astype('category')
+                
+                # Categorize the file based on filename
+                match = self._file_regex.search(filename)
+                file_key = self._pattern_to_key.get(match.group(0)) if match else None
+                
+                if file_key:
+                    csv_data[file_key] = df
+                    print(f"  -> Categorized as: {file_key} ({len(df)} rows)")
+                else:
+                    # Store with filename as key for uncategorized files
+                    clean_name = filename.replace('rvtools_', '').replace('.csv', '')
+                    csv_data[clean_name] = df
+                    print(f"  -> Stored as: {clean_name} ({len(df)} rows)")
             
             print(f"\nProcessed {len(all_files)} CSV files:")
             print(f"  - Successfully loaded: {len(csv_data)} files")
@@ -168,41 +275,57 @@ class RVToolsComprehensiveExtractor:
             for key in sorted(csv_data.keys()):
                 print(f"  - {key}: {len(csv_data[key])} records")
             
-            return csv_data, extract_dir
+            return csv_data
             
         except Exception as e:
             print(f"Error processing ZIP file: {e}")
-            return {}, extract_dir
+            return {}
 
     def convert_mib_to_gb(self, df):
         """Convert all MiB columns to GB and rename them"""
-        converted_df = df.copy()
-        
-        # Find all columns that contain 'MiB' and are numeric
-        mib_columns = [col for col in converted_df.columns if 'mib' in col.lower() and pd.api.types.is_numeric_dtype(converted_df[col])]
+        # Find all numeric columns that contain 'MiB', and those in MB (but not Mbps)
+        mib_columns = [col for col in df.columns if 'mib' in col.lower() and pd.api.types.is_numeric_dtype(df[col])]
+        mb_columns = [col for col in df.columns if 'mb' in col.lower() and 'mbps' not in col.lower()
+                      and col not in mib_columns and pd.api.types.is_numeric_dtype(df[col])]
         
-        for col in mib_columns:
-            # Convert MiB to GB (1 GiB = 1024 MiB, but we'll use 1024 for accuracy)
-            new_col_name = col.replace(' MiB', ' GB').replace('_MiB', '_GB').replace('MiB', '_GB')
-            converted_df[new_col_name] = (converted_df[col] / 1024).round(2)
-            
-            # Drop the original MiB column
-            converted_df = converted_df.drop(columns=[col])
-            print(f"    Converted {col} -> {new_col_name}")
+        if not mib_columns and not mb_columns:
+            return df
         
-        # Also convert MB columns to GB
-        mb_columns = [col for col in converted_df.columns if 'mb' in col.lower() and 'mbps' not in col.lower() and pd.api.types.is_numeric_dtype(converted_df[col])]
+        # Keep the untouched columns and append the converted ones in a single concat
+        converted = [df.drop(columns=mib_columns + mb_columns)]
+        gb_columns = []
         
-        for col in mb_columns:
+        if mib_columns:
+            # Convert MiB to GB (1 GiB = 1024 MiB, but we'll use 1024 for accuracy)
+            new_names = [col.replace(' MiB', ' GB').replace('_MiB', '_GB').replace('MiB', '_GB') for col in mib_columns]
+            block = df[mib_columns].to_numpy(dtype=np.float64) / 1024.0
+            converted.append(pd.DataFrame(block, columns=new_names, index=df.index))
+            gb_columns += new_names
+            for col, new_col_name in zip(mib_columns, new_names):
+                print(f"    Converted {col} -> {new_col_name}")
+        
+        if mb_columns:
             # Convert MB to GB (1000 MB = 1 GB)
-            new_col_name = col.replace(' MB', ' GB').replace('_MB', '_GB').replace('MB', '_GB')
-            converted_df[new_col_name] = (converted_df[col] / 1000).round(2)
-            
-            # Drop the original MB column
-            converted_df = converted_df.drop(columns=[col])
-            print(f"    Converted {col} -> {new_col_name}")
-        
-        return converted_df
+            new_names = [col.replace(' MB', ' GB').replace('_MB', '_GB').replace('MB', '_GB') for col in mb_columns]
+            block = df[mb_columns].to_numpy(dtype=np.float64) / 1000.0
+            converted.append(pd.DataFrame(block, columns=new_names, index=df.index))
+            gb_columns += new_names
+            for col, new_col_name in zip(mb_columns, new_names):
+                print(f"    Converted {col} -> {new_col_name}")
+        
+        # Values stay unrounded until they are aggregated per VM (see round_gb_columns)
+        result = pd.concat(converted, axis=1)
+        result.attrs['gb_columns'] = gb_columns
+        return result
+
+    def round_gb_columns(self, aggregated, source):
+        """Round the GB columns convert_mib_to_gb() added to source to 2 decimals"""
+        gb_columns = [col for col in source.attrs.get('gb_columns', []) if col in aggregated.columns]
+        if not gb_columns:
+            return aggregated
+        # Summing already divided values leaves float noise on half-cent ties (103.42500000000001), so
+        # snap to 9 decimals first; ties then round as they did when the raw MiB/MB totals were divided
+        return aggregated.round(dict.fromkeys(gb_columns, 9)).round(dict.fromkeys(gb_columns, 2))
 
     def aggregate_vm_data(self, df, vm_uuid_col='VM UUID'):
         """Aggregate data for VMs that have multiple records"""
@@ -210,24 +333,28 @@ class RVToolsComprehensiveExtractor:
             print(f"    Warning: Cannot aggregate - missing VM UUID column or empty dataframe")
             return df
         
-        # Check if we have multiple records per VM
-        vm_counts = df[vm_uuid_col].value_counts()
-        if vm_counts.max() == 1:
-            # Even if no aggregation needed, still convert MiB to GB
-            return self.convert_mib_to_gb(df)
+        # Check if we have multiple records per VM (no per-VM counts needed). Rows without a
+        # UUID are not a VM, so repeated NaNs don't count, as with value_counts()
+        if not df[vm_uuid_col].dropna().duplicated().any():
+            return df
         
-        print(f"    Aggregating {len(df)} records into {len(vm_counts)} unique VMs")
+        print(f"    Aggregating {len(df)} records into {df[vm_uuid_col].nunique()} unique VMs")
         
         try:
-            # Separate numeric and non-numeric columns
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-            text_cols = df.select_dtypes(include=['object']).columns.tolist()
+            # Separate numeric and text columns in a single pass over the dtypes
+            numeric_cols = []
+            text_cols = []
+            for col, dtype in df.dtypes.items():
+                if col == vm_uuid_col:
+                    continue
+                if isinstance(dtype, pd.CategoricalDtype):
+                    text_cols.append(col)
+                elif pd.api.types.is_string_dtype(dtype) or dtype == object:
+                    text_cols.append(col)
+                elif isinstance(dtype, np.dtype) and np.issubdtype(dtype, np.number):
+                    numeric_cols.append(col)
             
-            # Remove VM UUID from aggregation columns
-            if vm_uuid_col in numeric_cols:
-                numeric_cols.remove(vm_uuid_col)
-            if vm_uuid_col in text_cols:
-                text_cols.remove(vm_uuid_col)
+            lowered = {col: col.lower() for col in numeric_cols + text_cols}
             
             # Build aggregation dictionary
             agg_dict = {}
@@ -238,7 +365,7 @@ class RVToolsComprehensiveExtractor:
                     agg_dict[col] = self.aggregation_rules[col]
                 else:
                     # Default to sum for sizes/capacities, mean for others
-                    if any(word in col.lower() for word in ['size', 'capacity', 'mib', 'gb', 'mb', 'count', 'num']):
+                    if any(word in self.SUM_HINTS for word in re.findall(r'[a-z]+', lowered[col])):
                         agg_dict[col] = 'sum'
                     else:
                         agg_dict[col] = 'mean'
@@ -249,31 +376,49 @@ class RVToolsComprehensiveExtractor:
                     agg_dict[col] = self.aggregation_rules[col]
                 else:
                     # Default to taking first non-null value, or concatenate unique values
-                    if col.lower() in ['vm', 'name', 'powerstate', 'os', 'cluster', 'host', 'datacenter']:
+                    if lowered[col] in self.FIRST_COLS:
                         agg_dict[col] = 'first'
                     else:
-                        agg_dict[col] = lambda x: ' | '.join(x.dropna().unique()) if len(x.dropna()) > 1 else x.iloc[0] if len(x.dropna()) > 0 else ''
+                        agg_dict[col] = concat_unique
             
             # Perform aggregation
             if agg_dict:  # Only aggregate if we have rules
-                aggregated = df.groupby(vm_uuid_col).agg(agg_dict).reset_index()
-                # Convert MiB to GB after aggregation
-                return self.convert_mib_to_gb(aggregated)
+                grouped = df.groupby(vm_uuid_col, sort=False, observed=True)
+                
+                # One named aggregation pass; string functions (sum, mean, first, ...) stay on pandas' Cython path
+                named_aggs = {
+                    col: pd.NamedAgg(column=col, aggfunc=func)
+                    for col, func in agg_dict.items() if func is not concat_unique
+                }
+                if named_aggs:
+                    aggregated = grouped.agg(**named_aggs)
+                else:
+                    aggregated = pd.DataFrame(index=grouped.size().index)
+                
+                # Unique-value joins run on deduplicated values only
+                for col, func in agg_dict.items():
+                    if func is concat_unique:
+                        aggregated[col] = concat_unique_by_group(df, vm_uuid_col, col).reindex(aggregated.index, fill_value='')
+                
+                # Per-VM counts fit comfortably in the smallest integer type
+                for col in ('Num Disks', 'Num NICs'):
+                    if col in aggregated.columns:
+                        aggregated[col] = pd.to_numeric(aggregated[col], downcast='integer')
+                
+                return aggregated[list(agg_dict)].reset_index()
             else:
                 print(f"    Warning: No aggregation rules found, taking first record per VM")
                 # If no aggregation rules, just take first record per VM UUID
-                first_records = df.groupby(vm_uuid_col).first().reset_index()
-                return self.convert_mib_to_gb(first_records)
+                return df.groupby(vm_uuid_col, sort=False, observed=True).first().reset_index()
                 
         except Exception as e:
             print(f"    Warning: Aggregation failed ({e}), taking first record per VM")
             try:
                 # Fallback: just take first record per VM UUID
-                first_records = df.groupby(vm_uuid_col).first().reset_index()
-                return self.convert_mib_to_gb(first_records)
+                return df.groupby(vm_uuid_col, sort=False, observed=True).first().reset_index()
             except:
-                # Final fallback: return original data with MiB conversion
-                return self.convert_mib_to_gb(df)
+                # Final fallback: return original data
+                return df
     
     def merge_all_vm_data(self, csv_data):
         """Merge all VM data into single comprehensive dataframe"""
@@ -297,16 +442,29 @@ class RVToolsComprehensiveExtractor:
         
         print(f"Using {base_key} as base data ({len(csv_data[base_key])} records)")
         
+        # Share one categorical dtype for VM UUID across all sources, so grouping
+        # and aligning compare integer codes instead of hashing UUID strings
+        uuid_dtype = pd.CategoricalDtype(pd.unique(np.concatenate(
+            [df['VM UUID'].dropna().to_numpy() for df in csv_data.values() if 'VM UUID' in df.columns])))
+        # (on new frames, so the caller's csv_data is left untouched)
+        csv_data = {data_type: df.assign(**{'VM UUID': df['VM UUID'].astype(uuid_dtype)})
+                    if 'VM UUID' in df.columns else df
+                    for data_type, df in csv_data.items()}
+        
         # Start with base data
-        result_df = csv_data[base_key].copy()
-        result_df = self.aggregate_vm_data(result_df)
+        result_df = self.round_gb_columns(self.aggregate_vm_data(csv_data[base_key]), csv_data[base_key])
         
         if result_df.empty:
             print("Error: Base dataframe is empty after processing")
             return pd.DataFrame()
         
         # Rename base columns to avoid conflicts
-        result_df.columns = [f"{base_key}_{col}" if col != 'VM UUID' else col for col in result_df.columns]
+        result_df = result_df.rename(columns=lambda col: f"{base_key}_{col}" if col != 'VM UUID' else col)
+        
+        # Every other source is aligned to the base VMs (a left join) and concatenated once at the end
+        result_df = result_df.set_index('VM UUID', drop=False)
+        vm_index = result_df.index
+        frames = [result_df]
         merged_count = 1
         
         # Merge other data sources
@@ -318,27 +476,27 @@ class RVToolsComprehensiveExtractor:
             
             try:
                 # Aggregate data
-                aggregated_df = self.aggregate_vm_data(df)
+                aggregated_df = self.round_gb_columns(self.aggregate_vm_data(df), df)
                 
                 if aggregated_df.empty:
                     print(f"    Warning: {data_type} is empty after aggregation")
                     continue
                 
-                # Rename columns
-                merge_df = aggregated_df.copy()
-                merge_df.columns = [f"{data_type}_{col}" if col != 'VM UUID' else col for col in merge_df.columns]
-                
-                # Merge
-                before_count = len(result_df)
-                result_df = result_df.merge(merge_df, on='VM UUID', how='left')
+                # Rename columns and align to the base VMs. Rows without a VM UUID match no VM, and
+                # several of them would repeat the NaN label that reindex needs to be unique
+                merge_df = aggregated_df.dropna(subset=['VM UUID']).set_index('VM UUID').add_prefix(f"{data_type}_")
+                frames.append(merge_df.reindex(vm_index))
                 
-                print(f"    Merged successfully ({before_count} -> {len(result_df)} records)")
+                matched = vm_index.isin(merge_df.index).sum()
+                print(f"    Merged successfully ({matched} of {len(vm_index)} VMs matched)")
                 merged_count += 1
                 
             except Exception as e:
                 print(f"    Error merging {data_type}: {e}")
                 continue
         
+        result_df = pd.concat(frames, axis=1).reset_index(drop=True)
+        
         print(f"\nMerged {merged_count} data sources by VM UUID")
         print(f"Final dataset: {len(result_df)} VMs with {len(result_df.columns)} columns")
         
@@ -348,6 +506,7 @@ class RVToolsComprehensiveExtractor:
         """Filter output columns based on comprehensive_output setting"""
         if self.comprehensive_output:
             print("Output mode: COMPREHENSIVE (all available data)")
+            self._column_roles = self._resolve_column_roles(df.columns)
             return df
         
         print("Output mode: ESSENTIAL (CPU, RAM, Disk only)")
@@ -392,7 +551,8 @@ class RVToolsComprehensiveExtractor:
         
         # Filter dataframe to essential columns only
         available_columns = [col for col in essential_columns if col in df.columns]
-        filtered_df = df[available_columns].copy()
+        filtered_df = df[available_columns]
+        self._column_roles = self._resolve_column_roles(available_columns)
         
         print(f"  Filtered from {len(df.columns)} to {len(available_columns)} essential columns")
         print("  Essential columns included:")
@@ -414,7 +574,13 @@ class RVToolsComprehensiveExtractor:
                 break
         
         if power_col:
-            filtered_df = df[df[power_col].str.lower() == 'poweredon'].copy()
+            power_states = df[power_col]
+            if not isinstance(power_states.dtype, pd.CategoricalDtype):
+                power_states = power_states.astype('category')
+            
+            # Lowercase the few distinct categories instead of every row, then filter on their codes
+            powered_on_codes = np.flatnonzero(power_states.cat.categories.astype(str).str.lower() == 'poweredon')
+            filtered_df = df[np.isin(power_states.cat.codes.to_numpy(), powered_on_codes)]
             print(f"Power filter: {len(df)} total VMs -> {len(filtered_df)} powered on VMs")
             return filtered_df
         else:
@@ -422,49 +588,71 @@ class RVToolsComprehensiveExtractor:
         
         return df
     
+    def _resolve_column_roles(self, columns):
+        """Find the columns used by the summary in one pass (first match per role wins)"""
+        roles = {}
+        for col in columns:
+            name = col.lower()
+            if 'cpus' not in roles and 'cpu' in name and any(word in name for word in ['cpus', 'cores', 'sockets']):
+                roles['cpus'] = col
+            if 'memory_gb' not in roles and ('memory' in name or ('size' in name and 'gb' in name)):
+                roles['memory_gb'] = col
+            if 'disk_gb' not in roles and 'disk' in name and 'capacity' in name and 'gb' in name:
+                roles['disk_gb'] = col
+            if 'power' not in roles and 'powerstate' in name:
+                roles['power'] = col
+        return roles
+    
     def generate_summary_stats(self, df):
         """Generate summary statistics"""
         summary = {}
+        roles = self._column_roles if self._column_roles is not None else self._resolve_column_roles(df.columns)
         
         # Count VMs
         summary['total_vms'] = len(df)
         
         # CPU stats
-        cpu_cols = [col for col in df.columns if 'cpu' in col.lower() and any(word in col.lower() for word in ['cpus', 'cores', 'sockets'])]
-        if cpu_cols:
-            cpu_col = cpu_cols[0]
+        cpu_col = roles.get('cpus')
+        if cpu_col:
             summary['total_vcpus'] = df[cpu_col].sum() if pd.api.types.is_numeric_dtype(df[cpu_col]) else 0
         
         # Memory stats (now in GB)
-        mem_cols = [col for col in df.columns if 'memory' in col.lower() or ('size' in col.lower() and 'gb' in col.lower())]
-        if mem_cols:
-            mem_col = mem_cols[0]
-            if pd.api.types.is_numeric_dtype(df[mem_col]):
-                summary['total_memory_gb'] = df[mem_col].sum()
+        mem_col = roles.get('memory_gb')
+        if mem_col and pd.api.types.is_numeric_dtype(df[mem_col]):
+            summary['total_memory_gb'] = df[mem_col].sum()
         
         # Disk stats (now in GB)
-        disk_cols = [col for col in df.columns if 'disk' in col.lower() and 'capacity' in col.lower() and 'gb' in col.lower()]
-        if disk_cols:
-            disk_col = disk_cols[0]
-            if pd.api.types.is_numeric_dtype(df[disk_col]):
-                summary['total_disk_gb'] = df[disk_col].sum()
+        disk_col = roles.get('disk_gb')
+        if disk_col and pd.api.types.is_numeric_dtype(df[disk_col]):
+            summary['total_disk_gb'] = df[disk_col].sum()
         
         # Power state distribution
-        power_cols = [col for col in df.columns if 'powerstate' in col.lower()]
-        if power_cols:
-            power_col = power_cols[0]
-            summary['power_states'] = df[power_col].value_counts().to_dict()
+        power_col = roles.get('power')
+        if power_col:
+            power_counts = df[power_col].value_counts()
+            summary['power_states'] = power_counts[power_counts > 0].to_dict()
         
         return summary
     
-    def cleanup(self, extract_dir):
-        """Clean up temporary files"""
-        try:
-            import shutil
-            if os.path.exists(extract_dir):
-                shutil.rmtree(extract_dir)
-        except Exception as e:
-            print(f"Warning: Could not clean up {extract_dir}: {e}")
+    def write_csv(self, df, output_file):
+        """Write the output CSV as UTF-8 with BOM, using PyArrow's CSV writer when available"""
+        if PYARROW_AVAILABLE:
+            try:
+                # Write booleans as True/False like pandas does, leaving missing values empty. This also
+                # covers nullable 'boolean' columns and object columns of booleans (with NaN for gaps)
+                bool_cols = {col: df[col].map({True: 'True', False: 'False'})
+                             for col, dtype in df.dtypes.items()
+                             if pd.api.types.is_bool_dtype(dtype)
+                             or (dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == 'boolean')}
+                table = pa.Table.from_pandas(df.assign(**bool_cols), preserve_index=False)
+                with open(output_file, 'wb') as f:
+                    f.write(codecs.BOM_UTF8)
+                    pacsv.write_csv(table, f)
+                return
+            except pa.ArrowException as e:
+                print(f"Warning: PyArrow could not write CSV ({e}), using pandas")
+        
+        df.to_csv(output_file, index=False, encoding='utf-8-sig')
     
     def process(self):
         """Main processing function"""
@@ -472,80 +660,76 @@ class RVToolsComprehensiveExtractor:
         print(f"Filter: {'All VMs' if self.include_all else 'PoweredOn VMs only'}")
         print("=" * 60)
         
-        # Extract and read all CSVs
-        csv_data, extract_dir = self.extract_and_read_all_csvs()
+        # Read all CSVs from the ZIP
+        csv_data = self.extract_and_read_all_csvs()
         
-        try:
-            if not csv_data:
-                print("No data found in ZIP file")
-                return None
-            
-            print(f"\nProcessing and merging data...")
-            
-            # Merge all VM data
-            merged_df = self.merge_all_vm_data(csv_data)
-            
-            if merged_df is None or merged_df.empty:
-                print("Error: No VM data could be processed or merged")
-                return None
-            
-            print(f"Successfully merged data: {len(merged_df)} VMs with {len(merged_df.columns)} columns")
-            
-            # Apply power filter
-            filtered_df = self.apply_power_filter(merged_df)
-            
-            # Filter output columns based on mode
-            final_df = self.filter_output_columns(filtered_df)
-            
-            # Generate output filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filter_suffix = "_all" if self.include_all else "_poweredon"
-            output_suffix = "_comprehensive" if self.comprehensive_output else "_essential"
-            output_file = f"rvtools{output_suffix}{filter_suffix}_{timestamp}.csv"
-            
-            # Save to CSV
-            final_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-            print(f"\nOutput saved to: {output_file}")
-            
-            # Generate and print summary
-            summary = self.generate_summary_stats(final_df)
-            
-            print("\n" + "=" * 60)
-            print("SUMMARY REPORT")
-            print("=" * 60)
-            print(f"Total VMs: {summary.get('total_vms', 0)}")
-            
-            if 'total_vcpus' in summary:
-                print(f"Total vCPUs: {summary['total_vcpus']:.0f}")
-            
-            if 'total_memory_gb' in summary:
-                print(f"Total Memory: {summary['total_memory_gb']:.2f} GB")
-            
-            if 'total_disk_gb' in summary:
-                print(f"Total Disk Capacity: {summary['total_disk_gb']:.2f} GB")
-            
-            if 'power_states' in summary:
-                print("\nPower State Distribution:")
-                for state, count in summary['power_states'].items():
-                    print(f"  {state}: {count} VMs")
-            
-            print(f"\nColumns in output: {len(final_df.columns)}")
-            if self.comprehensive_output:
-                print("Column categories:")
-                categories = {}
-                for col in final_df.columns:
-                    category = col.split('_')[0] if '_' in col else 'base'
-                    categories[category] = categories.get(category, 0) + 1
-                
-                for cat, count in sorted(categories.items()):
-                    print(f"  {cat}: {count} columns")
-            else:
-                print("Essential columns only (CPU, RAM, Disk + basic VM info)")
-            
-            return output_file
-            
-        finally:
-            self.cleanup(extract_dir)
+        if not csv_data:
+            print("No data found in ZIP file")
+            return None
+        
+        print(f"\nProcessing and merging data...")
+        
+        # Merge all VM data
+        merged_df = self.merge_all_vm_data(csv_data)
+        
+        if merged_df is None or merged_df.empty:
+            print("Error: No VM data could be processed or merged")
+            return None
+        
+        print(f"Successfully merged data: {len(merged_df)} VMs with {len(merged_df.columns)} columns")
+        
+        # Apply power filter
+        filtered_df = self.apply_power_filter(merged_df)
+        
+        # Filter output columns based on mode
+        final_df = self.filter_output_columns(filtered_df)
+        
+        # Generate output filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filter_suffix = "_all" if self.include_all else "_poweredon"
+        output_suffix = "_comprehensive" if self.comprehensive_output else "_essential"
+        output_file = f"rvtools{output_suffix}{filter_suffix}_{timestamp}.csv"
+        
+        # Save to CSV
+        self.write_csv(final_df, output_file)
+        print(f"\nOutput saved to: {output_file}")
+        
+        # Generate and print summary
+        summary = self.generate_summary_stats(final_df)
+        
+        print("\n" + "=" * 60)
+        print("SUMMARY REPORT")
+        print("=" * 60)
+        print(f"Total VMs: {summary.get('total_vms', 0)}")
+        
+        if 'total_vcpus' in summary:
+            print(f"Total vCPUs: {summary['total_vcpus']:.0f}")
+        
+        if 'total_memory_gb' in summary:
+            print(f"Total Memory: {summary['total_memory_gb']:.2f} GB")
+        
+        if 'total_disk_gb' in summary:
+            print(f"Total Disk Capacity: {summary['total_disk_gb']:.2f} GB")
+        
+        if 'power_states' in summary:
+            print("\nPower State Distribution:")
+            for state, count in summary['power_states'].items():
+                print(f"  {state}: {count} VMs")
+        
+        print(f"\nColumns in output: {len(final_df.columns)}")
+        if self.comprehensive_output:
+            print("Column categories:")
+            categories = {}
+            for col in final_df.columns:
+                category = col.split('_')[0] if '_' in col else 'base'
+                categories[category] = categories.get(category, 0) + 1
+            
+            for cat, count in sorted(categories.items()):
+                print(f"  {cat}: {count} columns")
+        else:
+            print("Essential columns only (CPU, RAM, Disk + basic VM info)")
+        
+        return output_file
 
 
 def main():
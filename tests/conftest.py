@@ -0,0 +1,46 @@
+"""
+Shared fixtures for the RVTools extractor and VM BOM generator tests
+
+Run from the repository root with:
+    pip install pytest
+    python -m pytest tests
+"""
+
+import importlib.util
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+EXTRACTOR_SCRIPT = ROOT / 'rvtools_extractor.py.py'
+
+sys.path.insert(0, str(ROOT))
+
+
+def write_rvtools_zip(path, tabs):
+    """Write an RVTools-style ZIP: tabs maps a tab name (e.g. 'tabvCPU') to its header and rows"""
+    with zipfile.ZipFile(path, 'w') as zf:
+        for tab, rows in tabs.items():
+            zf.writestr(f"RVTools_{tab}.csv", "\n".join(";".join(map(str, row)) for row in rows) + "\n")
+    return path
+
+
+def run_extractor(zip_path, *flags):
+    """Run the extractor CLI next to zip_path; returns (output DataFrame, stdout)"""
+    result = subprocess.run([sys.executable, str(EXTRACTOR_SCRIPT), str(zip_path), *flags],
+                            cwd=zip_path.parent, capture_output=True, text=True, check=True)
+    output_file = next(zip_path.parent.glob('rvtools_*.csv'))
+    return pd.read_csv(output_file, encoding='utf-8-sig'), result.stdout
+
+
+@pytest.fixture(scope='session')
+def extractor():
+    """The rvtools_extractor module (its file name is not importable as is)"""
+    spec = importlib.util.spec_from_file_location('rvtools_extractor', EXTRACTOR_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
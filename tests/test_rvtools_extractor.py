@@ -0,0 +1,117 @@
+import csv
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from conftest import ROOT, run_extractor, write_rvtools_zip
+
+OS_COLUMN = 'OS according to the configuration file'
+
+CPU_TAB = [
+    ['VM', 'Powerstate', 'CPUs', OS_COLUMN, 'VM UUID'],
+    ['vm1', 'poweredOn', 2, 'Ubuntu Linux (64-bit)', 'uuid-1'],
+    ['vm2', 'poweredOn', 4, 'Microsoft Windows Server 2019 (64-bit)', 'uuid-2'],
+]
+MEMORY_TAB = [
+    ['VM', 'Size MiB', 'VM UUID'],
+    ['vm1', 2048, 'uuid-1'],
+    ['vm2', 4096, 'uuid-2'],
+]
+DISK_TAB = [
+    ['VM', 'Capacity MiB', 'Datastore', 'VM UUID'],
+    ['vm1', 10240, 'None', 'uuid-1'],
+    ['vm1', 10240, 'ds2', 'uuid-1'],
+    ['vm2', 51200, 'ds1', 'uuid-2'],
+]
+
+
+def test_blank_uuid_rows_do_not_drop_a_source(tmp_path):
+    # Templates and orphaned records have no VM UUID; several of them used to fail the whole merge
+    memory = MEMORY_TAB + [['template1', 1024, ''], ['template2', 1024, '']]
+    zip_path = write_rvtools_zip(tmp_path / 'rvtools.zip',
+                                 {'tabvCPU': CPU_TAB, 'tabvMemory': memory, 'tabvDisk': DISK_TAB})
+
+    df, stdout = run_extractor(zip_path)
+
+    assert 'Error merging' not in stdout
+    assert df.set_index('VM UUID')['memory_Size GB'].to_dict() == {'uuid-1': 2.0, 'uuid-2': 4.0}
+    assert 'Total Memory: 6.00 GB' in stdout
+
+    # The essential output still has every column vm_bom.py requires
+    output_file = next(tmp_path.glob('rvtools_*.csv'))
+    result = subprocess.run([sys.executable, str(ROOT / 'vm_bom.py'), str(output_file)],
+                            capture_output=True, text=True, check=True)
+    assert 'Successfully loaded 2 VMs' in result.stdout
+
+
+def test_blank_uuid_rows_in_the_base_source(extractor):
+    cpu = pd.DataFrame(CPU_TAB[1:] + [['orphan1', 'poweredOn', 1, 'Other', np.nan],
+                                      ['orphan2', 'poweredOn', 1, 'Other', np.nan]], columns=CPU_TAB[0])
+    memory = pd.DataFrame(MEMORY_TAB[1:] + [['template', 1024, np.nan]] * 2, columns=MEMORY_TAB[0])
+
+    result = extractor.RVToolsComprehensiveExtractor('unused.zip').merge_all_vm_data(
+        {'cpu': cpu, 'memory': memory})
+
+    # Base rows without a UUID are kept, but nothing is matched to them
+    assert result['cpu_VM'].tolist() == ['vm1', 'vm2', 'orphan1', 'orphan2']
+    assert result['memory_Size MiB'].tolist()[:2] == [2048, 4096]
+    assert result['memory_Size MiB'].iloc[2:].isna().all()
+
+
+def test_blank_uuids_alone_do_not_trigger_aggregation(extractor):
+    df = pd.DataFrame({'VM UUID': ['uuid-1', 'uuid-2', np.nan, np.nan], 'Size MiB': [1, 2, 3, 4]})
+
+    assert extractor.RVToolsComprehensiveExtractor('unused.zip').aggregate_vm_data(df) is df
+
+
+def test_merge_leaves_the_callers_frames_untouched(extractor):
+    csv_data = {'cpu': pd.DataFrame(CPU_TAB[1:], columns=CPU_TAB[0]),
+                'memory': pd.DataFrame(MEMORY_TAB[1:], columns=MEMORY_TAB[0])}
+    dtypes = {key: df.dtypes.copy() for key, df in csv_data.items()}
+
+    extractor.RVToolsComprehensiveExtractor('unused.zip').merge_all_vm_data(csv_data)
+
+    for key, df in csv_data.items():
+        pd.testing.assert_series_equal(df.dtypes, dtypes[key])
+
+
+def test_na_strings_are_missing_values(tmp_path):
+    zip_path = write_rvtools_zip(tmp_path / 'rvtools.zip', {'tabvCPU': CPU_TAB, 'tabvDisk': DISK_TAB})
+
+    df, _ = run_extractor(zip_path, '--comprehensive')
+
+    # "None" is read as missing (as pd.read_csv does), so it is not joined into the datastores
+    assert df.set_index('VM UUID')['disk_Datastore'].to_dict() == {'uuid-1': 'ds2', 'uuid-2': 'ds1'}
+
+
+def test_gb_totals_round_like_the_summed_source_values(tmp_path):
+    # 3.5 + 651.5 MB is 0.655 GB; summing 0.0035 + 0.6515 instead gives 0.65499999 and rounds down
+    partition = [['VM', 'Disk', 'Consumed MB', 'VM UUID'],
+                 ['vm1', 'C:', 3.5, 'uuid-1'],
+                 ['vm1', 'D:', 651.5, 'uuid-1'],
+                 ['vm2', 'C:', 1000, 'uuid-2']]
+    zip_path = write_rvtools_zip(tmp_path / 'rvtools.zip', {'tabvCPU': CPU_TAB, 'tabvPartition': partition})
+
+    df, _ = run_extractor(zip_path, '--comprehensive')
+
+    assert df.set_index('VM UUID')['partition_Consumed GB'].to_dict() == {'uuid-1': 0.66, 'uuid-2': 1.0}
+
+
+def test_booleans_are_written_like_pandas(extractor, tmp_path):
+    df = pd.DataFrame({
+        'VM UUID': ['uuid-1', 'uuid-2', 'uuid-3'],
+        'Thin': [True, False, True],
+        'Connected': pd.array([True, None, False], dtype='boolean'),
+        # Object column of booleans with a gap, as a left join leaves it
+        'Sync time': pd.Series([True, np.nan, False], dtype=object),
+    })
+    written = tmp_path / 'written.csv'
+    expected = tmp_path / 'expected.csv'
+
+    extractor.RVToolsComprehensiveExtractor('unused.zip').write_csv(df, written)
+    df.to_csv(expected, index=False, encoding='utf-8-sig')
+
+    with open(written, encoding='utf-8-sig') as f, open(expected, encoding='utf-8-sig') as g:
+        assert list(csv.reader(f)) == list(csv.reader(g))
@@ -0,0 +1,110 @@
+import csv
+import itertools
+
+import pytest
+
+import vm_bom
+
+HOURS_PER_MONTH = 744
+ESSENTIAL_HEADER = ['VM UUID', 'cpu_VM', 'cpu_CPUs', 'memory_Size GB', 'disk_Capacity GB',
+                    'cpu_OS according to the configuration file', 'cpu_Powerstate', 'cpu_Annotation']
+
+
+def write_inventory_csv(path, vms):
+    """Write vms (name, vCPUs, memory GB, disk GB, OS, power state) in the extractor's essential layout"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(ESSENTIAL_HEADER)
+        for i, (name, cpus, mem_gb, disk_gb, os_config, powerstate) in enumerate(vms):
+            writer.writerow([f"uuid-{i}", name, cpus, mem_gb, disk_gb, os_config, powerstate, ''])
+    return path
+
+
+def reference_line_costs(cpus, mem_gb, disk_gb, os_config):
+    """BOM line costs of one VM by component type, priced with round() as vm_bom.py originally did"""
+    ocpu = 0 if cpus <= 0 else (cpus + 1) // 2
+    lines = {}
+    if ocpu > 0:
+        lines["Compute"] = round(ocpu * (0.0279 * HOURS_PER_MONTH), 2)
+    if mem_gb > 0:
+        lines["Memory"] = round(mem_gb * (0.00186 * HOURS_PER_MONTH), 2)
+    if disk_gb > 0:
+        lines["Storage"] = round(disk_gb * 0.023715, 2)
+        lines["Storage Performance"] = round(disk_gb * 10 * 0.001581, 2)
+    if 'windows' in os_config.lower() and ocpu > 0:
+        lines["OS License"] = round(ocpu * (0.08556 * HOURS_PER_MONTH), 2)
+    return lines
+
+
+def reference_monthly_cost(cpus, mem_gb, disk_gb, os_config):
+    """Monthly cost of one VM: its line costs summed, then rounded"""
+    return round(sum(reference_line_costs(cpus, mem_gb, disk_gb, os_config).values()), 2)
+
+
+@pytest.fixture(params=[True, False], ids=['pyarrow-reader', 'csv-reader'])
+def generator(request, monkeypatch):
+    """A VMBOMGenerator reading CSVs with PyArrow (when installed) and with the csv module"""
+    if request.param and not vm_bom.PYARROW_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(vm_bom, 'PYARROW_AVAILABLE', request.param)
+    return vm_bom.VMBOMGenerator()
+
+
+def test_vms_sharing_a_name_are_priced_separately(generator, tmp_path):
+    vms = [
+        ('web01', 2, 4, 50, 'Ubuntu Linux (64-bit)', 'poweredOn'),
+        ('web01', 8, 16, 200, 'Microsoft Windows Server 2019 (64-bit)', 'poweredOn'),
+        ('db01', 4, 32, 500, 'Red Hat Enterprise Linux 8', 'poweredOff'),
+    ]
+    inventory = generator.read_vm_csv(str(write_inventory_csv(tmp_path / 'vms.csv', vms)))
+
+    analysis = generator._compute_all(inventory)
+    report = generator.generate_cost_report(analysis)
+
+    expected = [reference_monthly_cost(*vm[1:5]) for vm in vms[:2]]
+    assert [inventory.vm_names[i] for i in analysis.priced] == ['web01', 'web01']
+    assert analysis.pricing.monthly_cost[analysis.priced].tolist() == expected
+    assert "Total VMs Analyzed: 2 (powered on)" in report
+    assert f"Monthly Total Cost: €{round(sum(expected), 2):,.2f}" in report
+
+
+def test_report_and_excel_totals_match_line_by_line_pricing(generator, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    vms = []
+    for cpus, mem_gb, disk_gb in itertools.product([0, 1, 3, 8], [0, 1.5, 48.3], [0, 51.7, 1000, 2048.25]):
+        for os_config in ('Ubuntu Linux (64-bit)', 'Microsoft Windows Server 2019 (64-bit)'):
+            powerstate = 'poweredOff' if len(vms) % 7 == 3 else 'poweredOn'
+            vms.append((f"vm{len(vms)}", cpus, mem_gb, disk_gb, os_config, powerstate))
+    csv_file = write_inventory_csv(tmp_path / 'vms.csv', vms)
+    excel_file = tmp_path / 'vms_detailed_analysis.xlsx'
+
+    analysis = generator._compute_all(generator.read_vm_csv(str(csv_file)))
+    report = generator.generate_cost_report(analysis)
+    generator.export_detailed_analysis_to_excel(analysis, str(excel_file))
+
+    # Expected figures, one VM at a time in CSV order
+    priced = [vm for vm in vms if vm[5] == 'poweredOn' and reference_line_costs(*vm[1:5])]
+    monthly = {vm[0]: reference_monthly_cost(*vm[1:5]) for vm in priced}
+    component_totals = {}
+    for vm in priced:
+        for component, cost in reference_line_costs(*vm[1:5]).items():
+            component_totals[component] = component_totals.get(component, 0) + cost
+    total_monthly = round(sum(monthly.values()), 2)
+
+    assert f"Monthly Total Cost: €{total_monthly:,.2f}" in report
+    assert f"Annual Total Cost: €{round(total_monthly * 12, 2):,.2f}" in report
+    # Component totals are float sums; only their order of addition may differ
+    assert analysis.component_totals == pytest.approx(component_totals)
+
+    workbook = openpyxl.load_workbook(excel_file)
+    summary = list(workbook["Cost Summary"].iter_rows(min_row=2, values_only=True))
+    assert {row[0]: row[5] for row in summary[:-1]} == monthly
+    assert summary[-1][0] == "TOTAL" and summary[-1][5] == total_monthly
+
+    subtotals = {row[0].removesuffix(" Subtotal"): row[6]
+                 for row in workbook["Detailed Analysis"].iter_rows(min_row=2, values_only=True)
+                 if row and row[0] and row[0].endswith(" Subtotal")}
+    assert subtotals == monthly
+
+    breakdown = {row[0]: row[1] for row in workbook["Component Breakdown"].iter_rows(min_row=2, values_only=True)}
+    assert breakdown == pytest.approx(component_totals)
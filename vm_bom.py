@@ -6,39 +6,166 @@ Fixed to work with actual CSV column format
 FIXED: Added proper rounding for all values
 """
 
+import copy
 import csv
+import io
+import os
+import re
 import sys
 from dataclasses import dataclass
+from enum import IntEnum
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from itertools import zip_longest
+from typing import Dict, Final, List, Optional
+import numpy as np
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+HOURS_PER_MONTH: Final[int] = 744  # 31 days * 24 hours
+VPUS_PER_GB: Final[int] = 10  # Block volume performance units allocated per GB
+
+class Component(IntEnum):
+    """BOM line component, also the column of VMPricing.has_line / component_costs"""
+    COMPUTE = 0
+    MEMORY = 1
+    STORAGE = 2
+    STORAGE_VPU = 3
+    OS_LICENSE = 4
+
+# Display name, unit and description of each Component, formatted only when rendering
+COMPONENT_TYPES = ("Compute", "Memory", "Storage", "Storage Performance", "OS License")
+COMPONENT_UNITS = ("OCPU", "GB", "GB", "VPU", "OCPU")
+COMPONENT_DESCRIPTION_FMT = (
+    "OCPU ({ocpu} OCPU for {cpu} vCPU)",
+    "Memory ({mem:.1f} GB)",
+    "Block Volume Storage ({disk:.1f} GB)",
+    "Block Volume VPUs ({qty} VPUs)",
+    "Windows Server License ({ocpu} OCPU)",
+)
+
+@dataclass(slots=True, frozen=True)
+class BOMLineItems:
+    """Bill of Materials line items of all VMs stored column-wise, grouped by VM in CSV order"""
+    vm_idx: np.ndarray  # int32
+    component: np.ndarray  # int8, a Component
+    quantity: np.ndarray
+    unit_price: np.ndarray
+    total_cost: np.ndarray
+    vm_offsets: np.ndarray  # lines of VM i are vm_offsets[i]:vm_offsets[i + 1]
+
+@dataclass(slots=True, frozen=True)
+class VMInventory:
+    """VM specifications from CSV stored column-wise, one entry per VM"""
+    vm_names: List[str]
+    os_configs: List[str]
+    annotations: List[str]
+    powerstates: List[str]
+    cpu_cpus: np.ndarray  # int32
+    mem_size_gb: np.ndarray  # float64
+    disk_total_capacity_gb: np.ndarray  # float64
+    is_windows: np.ndarray  # bool
+    powered_on: np.ndarray  # bool
+    
+    def __len__(self):
+        return len(self.vm_names)
+
+@dataclass(slots=True, frozen=True)
+class VMPricing:
+    """Monthly pricing of every VM in a VMInventory, computed column-wise"""
+    ocpu_count: np.ndarray  # int32, 0 for powered off VMs
+    has_line: np.ndarray  # (n, 5) bool - component applies to the VM
+    component_costs: np.ndarray  # (n, 5) float64 - rounded monthly cost, 0 where no line
+    monthly_cost: np.ndarray
+    annual_cost: np.ndarray
+    priced: np.ndarray  # powered on with at least one cost line
+
+@dataclass(slots=True, frozen=True)
+class CostAnalysis:
+    """Priced inventory shared by the text report and the Excel export"""
+    inventory: VMInventory
+    pricing: VMPricing
+    priced: np.ndarray  # indices of VMs with costs, CSV order
+    sorted_order: np.ndarray  # the priced indices, most expensive first
+    powered_off: np.ndarray  # indices of powered off VMs, CSV order
+    line_items: BOMLineItems
+    os_types: List[str]  # display OS type of every VM ("Windows", "Linux", "Other")
+    component_totals: Dict[str, float]  # components that have lines, most expensive first
+
+def round_decimals(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Round to a number of decimals exactly like round() (correctly rounded, ties to even)
+    
+    np.round scales by 10**decimals first, which flips values sitting next to a
+    half unit (1000 GB of storage is 23.715 -> round() gives 23.71, np.round 23.72).
+    The rounding error of the scaling is recovered exactly (Dekker split) to settle
+    those cases.
+    """
+    scale = 10.0 ** decimals
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * scale
+        split = values * 134217729.0
+        hi = split - (split - values)
+        err = (hi * scale - scaled) + (values - hi) * scale
+        whole = np.floor(scaled)
+        excess = (scaled - whole - 0.5) + err
+        whole += (excess > 0) | ((excess == 0) & (whole % 2 == 1))
+        # Values this large have no decimals to round (this also keeps inf/nan as they are)
+        return np.where(np.abs(scaled) < 2.0 ** 53, whole / scale, values)
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """Round to 2 decimals exactly like round()"""
+    return round_decimals(values, 2)
+
+def scatter_rows(values: np.ndarray, rows: np.ndarray, n: int) -> np.ndarray:
+    """Spread values computed for some rows into a zero-filled array of n rows"""
+    out = np.zeros((n,) + values.shape[1:], dtype=values.dtype)
+    out[rows] = values
+    return out
+
+# Characters str.strip() removes, to trim PyArrow string columns exactly like the csv reader path
+PY_WHITESPACE: Final[str] = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005"
+    "\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+def parse_float(value: str) -> float:
+    """float(value), or 0.0 when it is not a number"""
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
 
-@dataclass
-class VMSpec:
-    """VM specification from CSV"""
-    vm_name: str
-    os_config: str
-    cpu_cpus: int
-    mem_size_gb: float
-    disk_total_capacity_gb: float
-    annotation: str
-    powerstate: str = ""
+# Report row templates, formatted once per row
+VM_ROW_FMT = "{vm:<25} {os:<12} {cpu:<5} {mem:<8.1f} {disk:<8.1f} €{monthly:<9.2f} €{annual:<11,.2f} {notes:<30}\n"
+POWERED_OFF_FMT = "{vm:<25} {os:<12} {cpu:<5} {mem:<8.1f} {disk:<8.1f} {notes:<42}\n"
+COMPONENT_FMT = "{component:<30} €{cost:>10.2f}/month ({pct:>5.1f}%)\n"
+DETAIL_FMT = "{vm:<25} {ct:<20} {desc:<35} {qty:<8.1f} €{up:<11.4f} €{tc:<9.2f}\n"
 
-@dataclass
-class BOMLine:
-    """Bill of Materials line item"""
-    vm_name: str
-    component_type: str
-    description: str
-    quantity: float
-    unit: str
-    unit_price: float
-    total_cost: float
+# Windows markers take precedence over Linux ones ("Ubuntu on Microsoft Hyper-V" is windows)
+WINDOWS_OS_PATTERN = re.compile(r'windows|microsoft', re.IGNORECASE)
+LINUX_OS_PATTERN = re.compile(r'ubuntu|centos|oracle linux|debian|suse|linux', re.IGNORECASE)
+
+@lru_cache(maxsize=256)
+def classify_os(os_config: str) -> str:
+    """Classify an os_config string; inventories repeat a handful of OS strings, so results are cached"""
+    if WINDOWS_OS_PATTERN.search(os_config):
+        return 'windows'
+    if LINUX_OS_PATTERN.search(os_config):
+        return 'linux'
+    return 'other'
 
 class VMBOMGenerator:
     def __init__(self, debug=False):
@@ -51,165 +178,272 @@ class VMBOMGenerator:
             "windows": {"description": "Windows Server License", "unit_price": 0.08556, "unit": "OCPU/hour"}
         }
         
-        self.hours_per_month = 744  # 31 days * 24 hours
+        self.hours_per_month = HOURS_PER_MONTH
         self.debug = debug
+        
+        # Monthly unit prices never change, so compute them once
+        self._ocpu_monthly = self.pricing_data["compute"]["unit_price"] * self.hours_per_month
+        self._mem_monthly = self.pricing_data["memory"]["unit_price"] * self.hours_per_month
+        self._storage_monthly = self.pricing_data["storage"]["unit_price"]
+        self._vpu_monthly = self.pricing_data["storage_vpu"]["unit_price"]
+        self._windows_monthly = self.pricing_data["windows"]["unit_price"] * self.hours_per_month
+        self._unit_prices = np.array([
+            self._ocpu_monthly, self._mem_monthly, self._storage_monthly, self._vpu_monthly, self._windows_monthly
+        ])  # Component order
+        # Unit prices as shown on the BOM lines
+        self._line_unit_prices = np.array([round(price, 4) for price in self._unit_prices.tolist()])
     
     def debug_print(self, message):
         """Print debug message if debug mode is enabled"""
         if self.debug:
             print(f"[DEBUG] {message}")
     
+    def debug_print_lines(self, messages: List[str]):
+        """Print many debug messages with a single write"""
+        if self.debug and messages:
+            print("\n".join(f"[DEBUG] {message}" for message in messages))
+    
+    def pricing_debug_lines(self, inventory: VMInventory, vms: np.ndarray, ocpu_count: np.ndarray) -> List[str]:
+        """Debug messages describing how each of the given VMs is priced"""
+        lines = []
+        for i, cpu_cpus, ocpu in zip(vms.tolist(), inventory.cpu_cpus[vms].tolist(), ocpu_count[vms].tolist()):
+            os_config = inventory.os_configs[i]
+            if cpu_cpus > 0:
+                lines.append(f"vCPUs: {cpu_cpus} -> OCPUs: {ocpu}")
+            lines.append(f"\nCalculating pricing for VM: {inventory.vm_names[i]}")
+            lines.append(f"OS: {os_config} (detected as: {self.detect_os_type(os_config)})")
+            lines.append(f"vCPUs: {cpu_cpus}, OCPUs: {ocpu}")
+            lines.append(f"Memory: {float(inventory.mem_size_gb[i])} GB")
+            lines.append(f"Storage: {float(inventory.disk_total_capacity_gb[i])} GB")
+        return lines
+    
     def detect_os_type(self, os_config: str) -> str:
         """Detect OS type from os_config string"""
-        os_lower = os_config.lower()
-        if 'windows' in os_lower or 'microsoft' in os_lower:
-            return 'windows'
-        elif any(linux in os_lower for linux in ['ubuntu', 'centos', 'oracle linux', 'debian', 'suse', 'linux']):
-            return 'linux'
-        return 'other'
+        return classify_os(os_config)
     
-    def calculate_ocpu_count(self, cpu_cpus: int) -> int:
-        """Calculate OCPU count (1 OCPU = 2 vCPUs, minimum 1 OCPU)"""
-        if cpu_cpus <= 0:
-            return 0
-        if cpu_cpus == 1:
-            ocpu = 1
-        else:
-            ocpu = (cpu_cpus + 1) // 2  # Round up
-        
-        self.debug_print(f"vCPUs: {cpu_cpus} -> OCPUs: {ocpu}")
-        return ocpu
+    def calculate_ocpu_count(self, cpu_cpus: np.ndarray) -> np.ndarray:
+        """Calculate OCPU counts (1 OCPU = 2 vCPUs, minimum 1 OCPU)"""
+        # (cpu + 1) // 2 rounds up and already maps 1 vCPU to 1 OCPU
+        return np.where(cpu_cpus <= 0, 0, (cpu_cpus + 1) // 2).astype(np.int32)
     
-    def calculate_vm_pricing(self, vm_spec: VMSpec) -> List[BOMLine]:
-        """Calculate pricing for a single VM"""
-        bom_lines = []
-        os_type = self.detect_os_type(vm_spec.os_config)
-        ocpu_count = self.calculate_ocpu_count(vm_spec.cpu_cpus)
-        
-        self.debug_print(f"\nCalculating pricing for VM: {vm_spec.vm_name}")
-        self.debug_print(f"OS: {vm_spec.os_config} (detected as: {os_type})")
-        self.debug_print(f"vCPUs: {vm_spec.cpu_cpus}, OCPUs: {ocpu_count}")
-        self.debug_print(f"Memory: {vm_spec.mem_size_gb} GB")
-        self.debug_print(f"Storage: {vm_spec.disk_total_capacity_gb} GB")
-        
-        # Skip VMs with no resources or powered off
-        if (ocpu_count == 0 and vm_spec.mem_size_gb == 0 and vm_spec.disk_total_capacity_gb == 0) or vm_spec.powerstate.lower() != 'poweredon':
-            if vm_spec.powerstate.lower() != 'poweredon':
-                self.debug_print(f"Skipping {vm_spec.vm_name} - not powered on ({vm_spec.powerstate})")
-            return bom_lines
-        
-        # 1. Compute - OCPU
-        if ocpu_count > 0:
-            ocpu_hourly = self.pricing_data["compute"]["unit_price"]
-            ocpu_monthly = ocpu_hourly * self.hours_per_month
-            ocpu_cost = ocpu_count * ocpu_monthly
-            
-            bom_lines.append(BOMLine(
-                vm_name=vm_spec.vm_name,
-                component_type="Compute",
-                description=f"OCPU ({ocpu_count} OCPU for {vm_spec.cpu_cpus} vCPU)",
-                quantity=float(ocpu_count),  # Ensure float for consistency
-                unit="OCPU",
-                unit_price=round(ocpu_monthly, 4),
-                total_cost=round(ocpu_cost, 2)
-            ))
-        
-        # 2. Memory
-        if vm_spec.mem_size_gb > 0:
-            mem_hourly = self.pricing_data["memory"]["unit_price"]
-            mem_monthly = mem_hourly * self.hours_per_month
-            memory_cost = vm_spec.mem_size_gb * mem_monthly
-            
-            bom_lines.append(BOMLine(
-                vm_name=vm_spec.vm_name,
-                component_type="Memory",
-                description=f"Memory ({vm_spec.mem_size_gb:.1f} GB)",
-                quantity=round(vm_spec.mem_size_gb, 1),
-                unit="GB",
-                unit_price=round(mem_monthly, 4),
-                total_cost=round(memory_cost, 2)
-            ))
-        
-        # 3. Block Storage
-        if vm_spec.disk_total_capacity_gb > 0:
-            storage_monthly = self.pricing_data["storage"]["unit_price"]
-            storage_cost = vm_spec.disk_total_capacity_gb * storage_monthly
-            
-            bom_lines.append(BOMLine(
-                vm_name=vm_spec.vm_name,
-                component_type="Storage",
-                description=f"Block Volume Storage ({vm_spec.disk_total_capacity_gb:.1f} GB)",
-                quantity=round(vm_spec.disk_total_capacity_gb, 1),
-                unit="GB",
-                unit_price=round(storage_monthly, 4),
-                total_cost=round(storage_cost, 2)
-            ))
-            
-            # 4. Storage VPUs (10 VPUs per GB of storage) - FIX: Proper rounding
-            vpu_count = vm_spec.disk_total_capacity_gb * 10
-            vpu_monthly = self.pricing_data["storage_vpu"]["unit_price"]
-            vpu_cost = vpu_count * vpu_monthly
-            
-            bom_lines.append(BOMLine(
-                vm_name=vm_spec.vm_name,
-                component_type="Storage Performance",
-                description=f"Block Volume VPUs ({round(vpu_count, 1)} VPUs)",
-                quantity=round(vpu_count, 1),  # FIX: Round to 1 decimal place
-                unit="VPU",
-                unit_price=round(vpu_monthly, 4),
-                total_cost=round(vpu_cost, 2)
-            ))
-        
-        # 5. Windows Licensing
-        if os_type == 'windows' and ocpu_count > 0:
-            windows_hourly = self.pricing_data["windows"]["unit_price"]
-            windows_monthly = windows_hourly * self.hours_per_month
-            windows_cost = ocpu_count * windows_monthly
-            
-            bom_lines.append(BOMLine(
-                vm_name=vm_spec.vm_name,
-                component_type="OS License",
-                description=f"Windows Server License ({ocpu_count} OCPU)",
-                quantity=float(ocpu_count),  # Ensure float for consistency
-                unit="OCPU",
-                unit_price=round(windows_monthly, 4),
-                total_cost=round(windows_cost, 2)
-            ))
-        
-        return bom_lines
+    def calculate_vm_pricing(self, inventory: VMInventory) -> VMPricing:
+        """Calculate pricing for all VMs at once"""
+        # Powered off VMs are not priced, so only the powered on ones go through the pricing
+        n = len(inventory)
+        powered_on = np.flatnonzero(inventory.powered_on)
+        all_on = len(powered_on) == n
+        cpu_cpus = inventory.cpu_cpus if all_on else inventory.cpu_cpus[powered_on]
+        mem_size_gb = inventory.mem_size_gb if all_on else inventory.mem_size_gb[powered_on]
+        disk_gb = inventory.disk_total_capacity_gb if all_on else inventory.disk_total_capacity_gb[powered_on]
+        is_windows = inventory.is_windows if all_on else inventory.is_windows[powered_on]
+        
+        ocpu_count = self.calculate_ocpu_count(cpu_cpus)
+        
+        # Which BOM lines each VM gets: compute, memory, storage, storage VPUs, Windows licensing
+        has_line = np.column_stack([
+            ocpu_count > 0,
+            mem_size_gb > 0,
+            disk_gb > 0,
+            disk_gb > 0,
+            is_windows & (ocpu_count > 0),
+        ])
+        
+        raw_costs = np.column_stack([
+            ocpu_count * self._ocpu_monthly,
+            mem_size_gb * self._mem_monthly,
+            disk_gb * self._storage_monthly,
+            disk_gb * VPUS_PER_GB * self._vpu_monthly,
+            ocpu_count * self._windows_monthly,
+        ])
+        
+        component_costs = np.where(has_line, round_cents(raw_costs), 0.0)
+        vm_total = component_costs.sum(axis=1)
+        monthly_cost = round_cents(vm_total)
+        annual_cost = round_cents(vm_total * 12)
+        
+        if not all_on:
+            # Back to one row per VM; powered off VMs keep zero OCPUs, no lines and no cost
+            ocpu_count, has_line, component_costs, monthly_cost, annual_cost = (
+                scatter_rows(values, powered_on, n)
+                for values in (ocpu_count, has_line, component_costs, monthly_cost, annual_cost)
+            )
+        
+        if self.debug:
+            self.debug_print_lines(self.pricing_debug_lines(inventory, powered_on, ocpu_count))
+        
+        return VMPricing(
+            ocpu_count=ocpu_count,
+            has_line=has_line,
+            component_costs=component_costs,
+            monthly_cost=monthly_cost,
+            annual_cost=annual_cost,
+            priced=has_line.any(axis=1)
+        )
     
-    def read_vm_csv(self, csv_file_path: str) -> List[VMSpec]:
+    def build_line_items(self, inventory: VMInventory, pricing: VMPricing) -> BOMLineItems:
+        """Build the BOM line items of all VMs from the vectorized pricing"""
+        # One line per set has_line flag, row by row: grouped by VM, Component order within a VM
+        vm_idx, component = np.nonzero(pricing.has_line)
+        ocpu_count = pricing.ocpu_count.astype(np.float64)
+        disk_gb = inventory.disk_total_capacity_gb
+        quantities = np.column_stack([
+            ocpu_count,
+            round_decimals(inventory.mem_size_gb, 1),
+            round_decimals(disk_gb, 1),
+            round_decimals(disk_gb * VPUS_PER_GB, 1),  # 10 VPUs per GB of storage
+            ocpu_count,
+        ])
+        
+        return BOMLineItems(
+            vm_idx=vm_idx.astype(np.int32),
+            component=component.astype(np.int8),
+            quantity=quantities[vm_idx, component],
+            unit_price=self._line_unit_prices[component],
+            total_cost=pricing.component_costs[vm_idx, component],
+            vm_offsets=np.concatenate(([0], np.cumsum(pricing.has_line.sum(axis=1))))
+        )
+    
+    def describe_line(self, inventory: VMInventory, pricing: VMPricing, i: int, component: int, quantity: float) -> str:
+        """Description of one BOM line of VM i"""
+        return COMPONENT_DESCRIPTION_FMT[component].format(
+            ocpu=pricing.ocpu_count[i],
+            cpu=inventory.cpu_cpus[i],
+            mem=inventory.mem_size_gb[i],
+            disk=inventory.disk_total_capacity_gb[i],
+            qty=quantity
+        )
+    
+    def build_inventory_columns(self, vm_names: List[str], os_configs: List[str], annotations: List[str],
+                                powerstates: List[str], cpu_cpus, mem_size_gb, disk_total_capacity_gb) -> VMInventory:
+        """Build the inventory from parsed columns, one entry per VM"""
+        # Inventories repeat a handful of OS strings and power states, so each distinct one is checked once
+        windows = {os_config: self.detect_os_type(os_config) == 'windows' for os_config in set(os_configs)}
+        running = {powerstate: powerstate.lower() == 'poweredon' for powerstate in set(powerstates)}
+        return VMInventory(
+            vm_names=vm_names,
+            os_configs=os_configs,
+            annotations=annotations,
+            powerstates=powerstates,
+            cpu_cpus=np.asarray(cpu_cpus, dtype=np.int32),
+            mem_size_gb=np.asarray(mem_size_gb, dtype=np.float64),
+            disk_total_capacity_gb=np.asarray(disk_total_capacity_gb, dtype=np.float64),
+            is_windows=np.array([windows[os_config] for os_config in os_configs], dtype=np.bool_),
+            powered_on=np.array([running[powerstate] for powerstate in powerstates], dtype=np.bool_)
+        )
+    
+    def read_vm_columns_arrow(self, csv_file_path: str, n_columns: int, column_index: Dict[str, int]) -> Optional[VMInventory]:
+        """Read the mapped columns with PyArrow's C parser
+        
+        Returns None when the file needs the row by row reader instead (ragged
+        rows, invalid UTF-8, or a vCPU count that is infinite or outside int32).
+        """
+        # Columns are addressed by position, header names may repeat
+        names = [f"column_{index}" for index in range(n_columns)]
+        columns = {key: names[index] for key, index in column_index.items()}
+        try:
+            table = pacsv.read_csv(
+                csv_file_path,
+                read_options=pacsv.ReadOptions(column_names=names, skip_rows=1),
+                parse_options=pacsv.ParseOptions(newlines_in_values=True),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=list(columns.values()),
+                    column_types={name: pa.string() for name in columns.values()}
+                )
+            )
+        except pa.ArrowInvalid as e:
+            self.debug_print(f"PyArrow could not parse the CSV, reading it row by row: {e}")
+            return None
+        
+        def text(key, default, repeated=False):
+            if key not in columns:
+                return [default] * table.num_rows
+            # Universal newlines like open(), then trimmed like str.strip()
+            values = pc.replace_substring_regex(table.column(columns[key]).combine_chunks(), r'\r\n?', '\n')
+            values = pc.utf8_trim(values, characters=PY_WHITESPACE)
+            if not repeated:
+                return values.to_pylist()
+            # Few distinct values: create each string once and share it between the rows
+            encoded = pc.dictionary_encode(values)
+            distinct = np.array(encoded.dictionary.to_pylist(), dtype=object)
+            return distinct[encoded.indices.to_numpy()].tolist()
+        
+        def number(key):
+            values = table.column(columns[key])
+            try:
+                # Empty cells count as 0, like any other value float() rejects
+                present = pc.if_else(pc.equal(values, ''), pa.scalar(None, pa.string()), values)
+                return pc.fill_null(pc.cast(present, pa.float64()), 0.0).to_numpy()
+            except pa.ArrowInvalid:
+                # Something Arrow cannot parse (padding, '1_000', text): parse it like the row by row reader
+                return np.array([parse_float(value) for value in values.to_pylist()], dtype=np.float64)
+        
+        cpu_values = number('cpu_cpus')
+        # inf, and counts that do not fit the int32 inventory column, are left to the row by row reader
+        if not (np.abs(np.nan_to_num(cpu_values, nan=0.0)) < 2 ** 31).all():
+            return None
+        cpu_cpus = np.trunc(np.nan_to_num(cpu_values, nan=0.0)).astype(np.int64)
+        mem_size_gb = number('mem_size_gb')
+        disk_total_capacity_gb = number('disk_total_capacity_gb')
+        vm_names = text('vm_name', '')
+        
+        # Skip rows without a VM name and VMs with zero resources
+        keep = np.array([bool(vm_name) for vm_name in vm_names], dtype=np.bool_)
+        keep &= ~((cpu_cpus == 0) & (mem_size_gb == 0) & (disk_total_capacity_gb == 0))
+        rows = np.flatnonzero(keep).tolist()
+        
+        def kept(values):
+            return [values[row] for row in rows]
+        
+        return self.build_inventory_columns(
+            vm_names=kept(vm_names),
+            os_configs=kept(text('os_config', '', repeated=True)),
+            annotations=kept(text('annotation', '', repeated=True)),
+            powerstates=kept(text('powerstate', 'poweredOn', repeated=True)),
+            cpu_cpus=cpu_cpus[keep],
+            mem_size_gb=mem_size_gb[keep],
+            disk_total_capacity_gb=disk_total_capacity_gb[keep]
+        )
+    
+    def read_vm_csv(self, csv_file_path: str) -> VMInventory:
         """Read VM specifications from CSV file with flexible column mapping"""
-        vm_specs = []
+        vm_names, os_configs, annotations, powerstates = [], [], [], []
+        cpu_buffer = np.empty(0, dtype=np.int32)
+        mem_buffer = np.empty(0, dtype=np.float64)
+        disk_buffer = np.empty(0, dtype=np.float64)
+        count = 0
         
         try:
             with open(csv_file_path, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
+                reader = csv.reader(file)
                 
                 # Clean column names
-                if reader.fieldnames:
-                    reader.fieldnames = [field.strip() for field in reader.fieldnames]
+                fieldnames = [field.strip() for field in next(reader, [])]
                 
-                print(f"CSV columns found: {reader.fieldnames}")
+                print(f"CSV columns found: {fieldnames}")
                 
-                # Map actual column names to expected names
+                # Map actual column names to expected names, and remember their positions
                 column_mapping = {}
-                for field in reader.fieldnames:
+                column_index = {}
+                for index, field in enumerate(fieldnames):
                     field_lower = field.lower()
                     if 'cpu_vm' in field_lower or field_lower == 'vm name' or field_lower == 'vm_name':
-                        column_mapping['vm_name'] = field
+                        key = 'vm_name'
                     elif 'cpu_os' in field_lower or 'os according' in field_lower:
-                        column_mapping['os_config'] = field
+                        key = 'os_config'
                     elif 'cpu_cpus' in field_lower or field_lower == 'vcpu' or field_lower == 'cpus':
-                        column_mapping['cpu_cpus'] = field
+                        key = 'cpu_cpus'
                     elif 'memory_size' in field_lower or 'mem_size' in field_lower or field_lower == 'memory gb':
-                        column_mapping['mem_size_gb'] = field
+                        key = 'mem_size_gb'
                     elif 'disk_capacity' in field_lower or 'disk_total' in field_lower or field_lower == 'disk gb':
-                        column_mapping['disk_total_capacity_gb'] = field
+                        key = 'disk_total_capacity_gb'
                     elif 'annotation' in field_lower or 'notes' in field_lower:
-                        column_mapping['annotation'] = field
+                        key = 'annotation'
                     elif 'powerstate' in field_lower or 'power_state' in field_lower:
-                        column_mapping['powerstate'] = field
+                        key = 'powerstate'
+                    else:
+                        continue
+                    column_mapping[key] = field
+                    column_index[key] = index
                 
                 print(f"Column mapping: {column_mapping}")
                 
@@ -219,216 +453,264 @@ class VMBOMGenerator:
                 
                 if missing:
                     print(f"ERROR: Cannot find columns for: {missing}")
-                    print("Available columns:", reader.fieldnames)
-                    return []
+                    print("Available columns:", fieldnames)
+                    return self.build_inventory_columns([], [], [], [], [], [], [])
+                
+                if PYARROW_AVAILABLE:
+                    inventory = self.read_vm_columns_arrow(csv_file_path, len(fieldnames), column_index)
+                    if inventory is not None:
+                        print(f"Successfully loaded {len(inventory)} VMs")
+                        return inventory
+                
+                idx_vm = column_index['vm_name']
+                idx_os = column_index['os_config']
+                idx_cpu = column_index['cpu_cpus']
+                idx_mem = column_index['mem_size_gb']
+                idx_disk = column_index['disk_total_capacity_gb']
+                idx_ann = column_index.get('annotation', -1)
+                idx_power = column_index.get('powerstate', -1)
                 
-                # Process rows
-                for row_num, row in enumerate(reader, start=2):
+                # Numeric columns go straight into typed buffers, sized for ~120 bytes per row and doubled when full
+                capacity = max(os.path.getsize(csv_file_path) // 120, 64)
+                for buffer in (cpu_buffer, mem_buffer, disk_buffer):
+                    buffer.resize(capacity, refcheck=False)
+                
+                # One string object per distinct OS, note and power state, shared by all rows that repeat it
+                shared_strings = {}
+                
+                # Process rows (blank lines are skipped, as DictReader did)
+                for row_num, row in enumerate((row for row in reader if row), start=2):
                     try:
                         # Skip empty rows
-                        vm_name_col = column_mapping.get('vm_name')
-                        if not vm_name_col or not row.get(vm_name_col, '').strip():
+                        vm_name = row[idx_vm].strip()
+                        if not vm_name:
                             continue
                         
-                        vm_name = row[vm_name_col].strip()
-                        os_config = row.get(column_mapping.get('os_config', ''), '').strip()
-                        annotation = row.get(column_mapping.get('annotation', ''), '').strip()
-                        powerstate = row.get(column_mapping.get('powerstate', ''), 'poweredOn').strip()
+                        os_config = row[idx_os].strip()
+                        os_config = shared_strings.setdefault(os_config, os_config)
+                        annotation = row[idx_ann].strip() if idx_ann >= 0 else ''
+                        annotation = shared_strings.setdefault(annotation, annotation)
+                        powerstate = row[idx_power].strip() if idx_power >= 0 else 'poweredOn'
+                        powerstate = shared_strings.setdefault(powerstate, powerstate)
                         
                         try:
-                            cpu_cpus = int(float(row.get(column_mapping.get('cpu_cpus', ''), 0)))
-                        except (ValueError, TypeError):
+                            cpu_cpus = int(float(row[idx_cpu]))
+                        except (ValueError, TypeError, IndexError):
                             cpu_cpus = 0
                         
                         try:
-                            mem_size_gb = float(row.get(column_mapping.get('mem_size_gb', ''), 0))
-                        except (ValueError, TypeError):
+                            mem_size_gb = float(row[idx_mem])
+                        except (ValueError, TypeError, IndexError):
                             mem_size_gb = 0.0
                         
                         try:
-                            disk_total_capacity_gb = float(row.get(column_mapping.get('disk_total_capacity_gb', ''), 0))
-                        except (ValueError, TypeError):
+                            disk_total_capacity_gb = float(row[idx_disk])
+                        except (ValueError, TypeError, IndexError):
                             disk_total_capacity_gb = 0.0
                         
                         # Skip VMs with zero resources
                         if cpu_cpus == 0 and mem_size_gb == 0 and disk_total_capacity_gb == 0:
                             continue
                         
-                        vm_specs.append(VMSpec(
-                            vm_name=vm_name,
-                            os_config=os_config,
-                            cpu_cpus=cpu_cpus,
-                            mem_size_gb=mem_size_gb,
-                            disk_total_capacity_gb=disk_total_capacity_gb,
-                            annotation=annotation,
-                            powerstate=powerstate
-                        ))
+                        if count == capacity:
+                            capacity *= 2
+                            for buffer in (cpu_buffer, mem_buffer, disk_buffer):
+                                buffer.resize(capacity, refcheck=False)
+                        cpu_buffer[count] = cpu_cpus
+                        mem_buffer[count] = mem_size_gb
+                        disk_buffer[count] = disk_total_capacity_gb
+                        vm_names.append(vm_name)
+                        os_configs.append(os_config)
+                        annotations.append(annotation)
+                        powerstates.append(powerstate)
+                        count += 1
                         
                     except Exception as e:
                         print(f"Warning: Error processing row {row_num}: {e}")
                         continue
                 
-                print(f"Successfully loaded {len(vm_specs)} VMs")
+                print(f"Successfully loaded {count} VMs")
                     
         except FileNotFoundError:
             print(f"Error: File '{csv_file_path}' not found")
         except Exception as e:
             print(f"Error reading CSV: {e}")
         
-        return vm_specs
+        for buffer in (cpu_buffer, mem_buffer, disk_buffer):
+            buffer.resize(count, refcheck=False)
+        return self.build_inventory_columns(
+            vm_names=vm_names,
+            os_configs=os_configs,
+            annotations=annotations,
+            powerstates=powerstates,
+            cpu_cpus=cpu_buffer,
+            mem_size_gb=mem_buffer,
+            disk_total_capacity_gb=disk_buffer
+        )
+    
+    def _compute_all(self, inventory: VMInventory) -> CostAnalysis:
+        """Price the inventory once for both the text report and the Excel export"""
+        # Calculate pricing for all VMs at once
+        pricing = self.calculate_vm_pricing(inventory)
+        priced = np.flatnonzero(pricing.priced)  # Only include VMs with costs
+        
+        line_items = self.build_line_items(inventory, pricing)
+        
+        # Display OS type of every VM, worked out once per distinct os_config
+        os_type_titles = {os_config: self.detect_os_type(os_config).title() for os_config in set(inventory.os_configs)}
+        os_types = [os_type_titles[os_config] for os_config in inventory.os_configs]
+        
+        # Components with at least one line, most expensive first; ties keep the order they first appear in the CSV
+        component_totals = {}
+        if len(priced):
+            totals = np.bincount(line_items.component, weights=line_items.total_cost, minlength=len(Component))
+            # Lines run VM by VM in Component order, so the first VM with a line orders the components
+            first_vm = pricing.has_line.argmax(axis=0)
+            by_appearance = np.argsort(first_vm, kind='stable')
+            by_appearance = by_appearance[pricing.has_line[first_vm[by_appearance], by_appearance]]
+            for k in by_appearance[np.argsort(-totals[by_appearance], kind='stable')].tolist():
+                component_totals[COMPONENT_TYPES[k]] = float(totals[k])
+        
+        return CostAnalysis(
+            inventory=inventory,
+            pricing=pricing,
+            priced=priced,
+            # Most expensive first; the stable sort keeps CSV order among equal costs
+            sorted_order=priced[np.argsort(-pricing.monthly_cost[priced], kind='stable')],
+            powered_off=np.flatnonzero(~inventory.powered_on),
+            line_items=line_items,
+            os_types=os_types,
+            component_totals=component_totals
+        )
     
-    def generate_cost_report(self, vm_specs: List[VMSpec]) -> str:
+    def generate_cost_report(self, analysis: CostAnalysis) -> str:
         """Generate complete cost report"""
-        if not vm_specs:
+        if not len(analysis.inventory):
             return "No VMs to process"
         
-        all_bom_lines = []
-        vm_summaries = {}
-        powered_off_vms = []
-        
-        # Calculate pricing for each VM
-        for vm_spec in vm_specs:
-            if vm_spec.powerstate.lower() != 'poweredon':
-                powered_off_vms.append(vm_spec)
-                continue
-                
-            bom_lines = self.calculate_vm_pricing(vm_spec)
-            if bom_lines:  # Only include VMs with costs
-                all_bom_lines.extend(bom_lines)
-                vm_total = sum(line.total_cost for line in bom_lines)
-                vm_summaries[vm_spec.vm_name] = {
-                    'spec': vm_spec,
-                    'monthly_cost': round(vm_total, 2),  # FIX: Round monthly cost
-                    'annual_cost': round(vm_total * 12, 2),  # FIX: Round annual cost
-                    'bom_lines': bom_lines
-                }
-        
-        if not vm_summaries:
+        if not len(analysis.priced):
             return "No valid powered-on VMs with pricing found"
         
+        inventory = analysis.inventory
+        pricing = analysis.pricing
+        priced = analysis.priced
+        sorted_vms = analysis.sorted_order
+        powered_off_vms = analysis.powered_off
+        line_items = analysis.line_items
+        os_types = analysis.os_types
+        
         # Generate report
-        report = []
-        report.append("=" * 120)
-        report.append("VIRTUAL MACHINE COST ANALYSIS REPORT")
-        report.append("Oracle Cloud Infrastructure Pricing")
-        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("Pricing in EUR - 24/7 operation (744 hours/month)")
-        report.append("=" * 120)
-        report.append("")
+        buf = io.StringIO()
+        w = buf.write
+        w("=" * 120 + "\n")
+        w("VIRTUAL MACHINE COST ANALYSIS REPORT\n")
+        w("Oracle Cloud Infrastructure Pricing\n")
+        w(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        w("Pricing in EUR - 24/7 operation (744 hours/month)\n")
+        w("=" * 120 + "\n")
+        w("\n")
         
         # Executive Summary
-        total_monthly = round(sum(s['monthly_cost'] for s in vm_summaries.values()), 2)  # FIX: Round total
+        total_monthly = round(float(pricing.monthly_cost[priced].sum()), 2)  # FIX: Round total
         total_annual = round(total_monthly * 12, 2)  # FIX: Round total
         
-        report.append("EXECUTIVE SUMMARY")
-        report.append("-" * 60)
-        report.append(f"Total VMs Analyzed: {len(vm_summaries)} (powered on)")
-        if powered_off_vms:
-            report.append(f"VMs Excluded (powered off): {len(powered_off_vms)}")
-        report.append(f"Monthly Total Cost: €{total_monthly:,.2f}")
-        report.append(f"Annual Total Cost: €{total_annual:,.2f}")
-        report.append(f"Average Cost per VM: €{total_monthly/len(vm_summaries):,.2f}/month")
-        report.append("")
+        w("EXECUTIVE SUMMARY\n")
+        w("-" * 60 + "\n")
+        w(f"Total VMs Analyzed: {len(priced)} (powered on)\n")
+        if len(powered_off_vms):
+            w(f"VMs Excluded (powered off): {len(powered_off_vms)}\n")
+        w(f"Monthly Total Cost: €{total_monthly:,.2f}\n")
+        w(f"Annual Total Cost: €{total_annual:,.2f}\n")
+        w(f"Average Cost per VM: €{total_monthly/len(priced):,.2f}/month\n")
+        w("\n")
         
         # VM Details Table
-        report.append("DETAILED VM COST BREAKDOWN")
-        report.append("-" * 120)
-        report.append(f"{'VM Name':<25} {'OS Type':<12} {'vCPU':<5} {'RAM':<8} {'Disk':<8} {'Monthly':<10} {'Annual':<12} {'Notes':<30}")
-        report.append("-" * 120)
-        
-        sorted_vms = sorted(vm_summaries.items(), key=lambda x: x[1]['monthly_cost'], reverse=True)
-        for vm_name, summary in sorted_vms:
-            spec = summary['spec']
-            os_type = self.detect_os_type(spec.os_config).title()
-            notes = spec.annotation[:28] + ".." if len(spec.annotation) > 30 else spec.annotation
-            report.append(f"{vm_name:<25} {os_type:<12} {spec.cpu_cpus:<5} {spec.mem_size_gb:<8.1f} {spec.disk_total_capacity_gb:<8.1f} €{summary['monthly_cost']:<9.2f} €{summary['annual_cost']:<11,.2f} {notes:<30}")
-        
-        report.append("-" * 120)
-        report.append(f"{'TOTAL':<25} {'':<12} {'':<5} {'':<8} {'':<8} €{total_monthly:<9.2f} €{total_annual:<11,.2f}")
-        report.append("")
+        w("DETAILED VM COST BREAKDOWN\n")
+        w("-" * 120 + "\n")
+        w(f"{'VM Name':<25} {'OS Type':<12} {'vCPU':<5} {'RAM':<8} {'Disk':<8} {'Monthly':<10} {'Annual':<12} {'Notes':<30}\n")
+        w("-" * 120 + "\n")
+        for i in sorted_vms:
+            os_type = os_types[i]
+            annotation = inventory.annotations[i]
+            notes = annotation[:28] + ".." if len(annotation) > 30 else annotation
+            w(VM_ROW_FMT.format(vm=inventory.vm_names[i], os=os_type, cpu=inventory.cpu_cpus[i], mem=inventory.mem_size_gb[i],
+                                disk=inventory.disk_total_capacity_gb[i], monthly=pricing.monthly_cost[i], annual=pricing.annual_cost[i], notes=notes))
+        
+        w("-" * 120 + "\n")
+        w(f"{'TOTAL':<25} {'':<12} {'':<5} {'':<8} {'':<8} €{total_monthly:<9.2f} €{total_annual:<11,.2f}\n")
+        w("\n")
         
         # Powered off VMs summary
-        if powered_off_vms:
-            report.append("POWERED OFF VMs (Not included in cost calculation)")
-            report.append("-" * 80)
-            for vm in powered_off_vms:
-                os_type = self.detect_os_type(vm.os_config).title()
-                notes = vm.annotation[:40] + ".." if len(vm.annotation) > 42 else vm.annotation
-                report.append(f"{vm.vm_name:<25} {os_type:<12} {vm.cpu_cpus:<5} {vm.mem_size_gb:<8.1f} {vm.disk_total_capacity_gb:<8.1f} {notes:<42}")
-            report.append("")
+        if len(powered_off_vms):
+            w("POWERED OFF VMs (Not included in cost calculation)\n")
+            w("-" * 80 + "\n")
+            for i in powered_off_vms:
+                os_type = os_types[i]
+                annotation = inventory.annotations[i]
+                notes = annotation[:40] + ".." if len(annotation) > 42 else annotation
+                w(POWERED_OFF_FMT.format(vm=inventory.vm_names[i], os=os_type, cpu=inventory.cpu_cpus[i], mem=inventory.mem_size_gb[i],
+                                         disk=inventory.disk_total_capacity_gb[i], notes=notes))
+            w("\n")
         
         # Component Cost Breakdown
-        report.append("COST BREAKDOWN BY COMPONENT TYPE")
-        report.append("-" * 70)
-        
-        component_totals = {}
-        for line in all_bom_lines:
-            if line.component_type not in component_totals:
-                component_totals[line.component_type] = 0
-            component_totals[line.component_type] += line.total_cost
+        w("COST BREAKDOWN BY COMPONENT TYPE\n")
+        w("-" * 70 + "\n")
         
-        for component, cost in sorted(component_totals.items(), key=lambda x: x[1], reverse=True):
+        for component, cost in analysis.component_totals.items():
             percentage = (cost / total_monthly) * 100
-            report.append(f"{component:<30} €{cost:>10.2f}/month ({percentage:>5.1f}%)")
+            w(COMPONENT_FMT.format(component=component, cost=cost, pct=percentage))
         
-        report.append("")
+        w("\n")
         
         # Detailed Component Analysis
-        report.append("DETAILED COMPONENT ANALYSIS")
-        report.append("-" * 120)
-        report.append(f"{'VM Name':<25} {'Component':<20} {'Description':<35} {'Qty':<8} {'Unit Price':<12} {'Total':<10}")
-        report.append("-" * 120)
-        
-        for vm_name, summary in sorted_vms:
-            for i, line in enumerate(summary['bom_lines']):
-                vm_display = vm_name if i == 0 else ""
-                report.append(f"{vm_display:<25} {line.component_type:<20} {line.description:<35} {line.quantity:<8.1f} €{line.unit_price:<11.4f} €{line.total_cost:<9.2f}")
-            if summary['bom_lines']:
-                report.append("-" * 120)
-        
-        return "\n".join(report)
+        w("DETAILED COMPONENT ANALYSIS\n")
+        w("-" * 120 + "\n")
+        w(f"{'VM Name':<25} {'Component':<20} {'Description':<35} {'Qty':<8} {'Unit Price':<12} {'Total':<10}\n")
+        w("-" * 120 + "\n")
+        
+        components = line_items.component.tolist()
+        quantities = line_items.quantity.tolist()
+        unit_prices = line_items.unit_price.tolist()
+        total_costs = line_items.total_cost.tolist()
+        offsets = line_items.vm_offsets.tolist()
+        for i in sorted_vms:
+            start, end = offsets[i], offsets[i + 1]
+            for j in range(start, end):
+                k = components[j]
+                vm_display = inventory.vm_names[i] if j == start else ""
+                w(DETAIL_FMT.format(vm=vm_display, ct=COMPONENT_TYPES[k],
+                                    desc=self.describe_line(inventory, pricing, i, k, quantities[j]),
+                                    qty=quantities[j], up=unit_prices[j], tc=total_costs[j]))
+            if end > start:
+                w("-" * 120 + "\n")
+        
+        # No newline after the last line, like the joined list this used to be
+        return buf.getvalue().removesuffix("\n")
     
-    def export_detailed_analysis_to_excel(self, vm_specs: List[VMSpec], output_file: str):
+    def export_detailed_analysis_to_excel(self, analysis: CostAnalysis, output_file: str):
         """Export detailed component analysis to Excel file"""
         if not EXCEL_AVAILABLE:
             print("Error: openpyxl library not installed. Install with: pip install openpyxl")
             return
         
-        if not vm_specs:
+        if not len(analysis.inventory):
             print("No VMs to export")
             return
         
-        # Calculate all BOM lines
-        all_bom_lines = []
-        vm_summaries = {}
-        powered_off_vms = []
-        
-        for vm_spec in vm_specs:
-            if vm_spec.powerstate.lower() != 'poweredon':
-                powered_off_vms.append(vm_spec)
-                continue
-                
-            bom_lines = self.calculate_vm_pricing(vm_spec)
-            if bom_lines:
-                all_bom_lines.extend(bom_lines)
-                vm_total = sum(line.total_cost for line in bom_lines)
-                vm_summaries[vm_spec.vm_name] = {
-                    'spec': vm_spec,
-                    'monthly_cost': round(vm_total, 2),  # FIX: Round for Excel too
-                    'annual_cost': round(vm_total * 12, 2),  # FIX: Round for Excel too
-                    'bom_lines': bom_lines
-                }
-        
-        if not vm_summaries:
+        if not len(analysis.priced):
             print("No valid VMs with pricing found")
             return
         
-        # Create workbook
-        wb = openpyxl.Workbook()
+        inventory = analysis.inventory
+        pricing = analysis.pricing
+        priced = analysis.priced
+        sorted_vms = analysis.sorted_order
+        powered_off_vms = analysis.powered_off
+        line_items = analysis.line_items
+        os_types = analysis.os_types
         
-        # Summary sheet
-        ws_summary = wb.active
-        ws_summary.title = "Cost Summary"
+        # Create workbook; write-only streams the rows out instead of keeping every cell in memory
+        wb = openpyxl.Workbook(write_only=True)
         
         # Header styling
         header_font = Font(bold=True, color="FFFFFF")
@@ -439,136 +721,143 @@ class VMBOMGenerator:
         currency_format = '€#,##0.00'
         number_format = '#,##0.0'
         
-        # Summary sheet headers
+        def cell_template(ws, number_format=None, font=None, fill=None, alignment=None):
+            """Styled cell copied for every value of a column, so styles are only resolved once"""
+            cell = WriteOnlyCell(ws)
+            if number_format:
+                cell.number_format = number_format
+            if font:
+                cell.font = font
+            if fill:
+                cell.fill = fill
+            if alignment:
+                cell.alignment = alignment
+            return cell
+        
+        def styled(template, value):
+            cell = copy.copy(template)
+            cell.value = value
+            return cell
+        
+        def column_styles(templates):
+            """(column, template) pairs of the styled columns; a None template writes a plain value"""
+            return [(col, template) for col, template in enumerate(templates) if template is not None]
+        
+        def write_sheet(ws, headers, rows):
+            """Write the header and the (values, column_styles) rows"""
+            # Write-only sheets emit the column widths before the first row, so size them up front
+            # Transposed column by column; blanks count as 'None', as when the widths were fitted per cell
+            columns = zip_longest(headers, *(values for values, _ in rows))
+            for col, column in enumerate(columns, 1):
+                ws.column_dimensions[get_column_letter(col)].width = min(max(map(len, map(str, column))) + 2, 50)
+            
+            header_template = cell_template(ws, font=header_font, fill=header_fill, alignment=header_alignment)
+            ws.append([styled(header_template, header) for header in headers])
+            for values, styles in rows:
+                for col, template in styles:
+                    values[col] = styled(template, values[col])
+                ws.append(values)
+        
+        # Summary sheet
+        ws_summary = wb.create_sheet("Cost Summary")
         summary_headers = ["VM Name", "OS Type", "vCPU", "RAM (GB)", "Disk (GB)", "Monthly Cost", "Annual Cost", "Notes"]
-        for col, header in enumerate(summary_headers, 1):
-            cell = ws_summary.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        number_cell = cell_template(ws_summary, number_format=number_format)
+        currency_cell = cell_template(ws_summary, number_format=currency_format)
+        summary_styles = column_styles([None, None, None, number_cell, number_cell, currency_cell, currency_cell, None])
         
         # Summary data
-        total_monthly = round(sum(s['monthly_cost'] for s in vm_summaries.values()), 2)  # FIX: Round total
+        total_monthly = round(float(pricing.monthly_cost[priced].sum()), 2)  # FIX: Round total
         total_annual = round(total_monthly * 12, 2)  # FIX: Round total
-        
-        sorted_vms = sorted(vm_summaries.items(), key=lambda x: x[1]['monthly_cost'], reverse=True)
-        row = 2
-        for vm_name, summary in sorted_vms:
-            spec = summary['spec']
-            os_type = self.detect_os_type(spec.os_config).title()
-            
-            ws_summary.cell(row=row, column=1, value=vm_name)
-            ws_summary.cell(row=row, column=2, value=os_type)
-            ws_summary.cell(row=row, column=3, value=spec.cpu_cpus)
-            ws_summary.cell(row=row, column=4, value=spec.mem_size_gb).number_format = number_format
-            ws_summary.cell(row=row, column=5, value=spec.disk_total_capacity_gb).number_format = number_format
-            ws_summary.cell(row=row, column=6, value=summary['monthly_cost']).number_format = currency_format
-            ws_summary.cell(row=row, column=7, value=summary['annual_cost']).number_format = currency_format
-            ws_summary.cell(row=row, column=8, value=spec.annotation)
-            row += 1
+        rows = [
+            ([inventory.vm_names[i], os_types[i], cpu_cpus, mem_size_gb, disk_gb, monthly_cost, annual_cost,
+              inventory.annotations[i]], summary_styles)
+            for i, cpu_cpus, mem_size_gb, disk_gb, monthly_cost, annual_cost in zip(
+                sorted_vms.tolist(),
+                inventory.cpu_cpus[sorted_vms].tolist(),
+                inventory.mem_size_gb[sorted_vms].tolist(),
+                inventory.disk_total_capacity_gb[sorted_vms].tolist(),
+                pricing.monthly_cost[sorted_vms].tolist(),
+                pricing.annual_cost[sorted_vms].tolist()
+            )
+        ]
         
         # Total row
-        ws_summary.cell(row=row, column=1, value="TOTAL").font = Font(bold=True)
-        ws_summary.cell(row=row, column=6, value=total_monthly).number_format = currency_format
-        ws_summary.cell(row=row, column=6).font = Font(bold=True)
-        ws_summary.cell(row=row, column=7, value=total_annual).number_format = currency_format
-        ws_summary.cell(row=row, column=7).font = Font(bold=True)
+        bold_cell = cell_template(ws_summary, font=Font(bold=True))
+        bold_currency_cell = cell_template(ws_summary, number_format=currency_format, font=Font(bold=True))
+        rows.append((["TOTAL", None, None, None, None, total_monthly, total_annual],
+                     column_styles([bold_cell, None, None, None, None, bold_currency_cell, bold_currency_cell])))
+        write_sheet(ws_summary, summary_headers, rows)
         
         # Powered off VMs sheet
-        if powered_off_vms:
+        if len(powered_off_vms):
             ws_powered_off = wb.create_sheet("Powered Off VMs")
-            
             headers = ["VM Name", "OS Type", "vCPU", "RAM (GB)", "Disk (GB)", "Power State", "Notes"]
-            for col, header in enumerate(headers, 1):
-                cell = ws_powered_off.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
+            number_cell = cell_template(ws_powered_off, number_format=number_format)
+            styles = column_styles([None, None, None, number_cell, number_cell, None, None])
             
-            row = 2
-            for vm in powered_off_vms:
-                os_type = self.detect_os_type(vm.os_config).title()
-                ws_powered_off.cell(row=row, column=1, value=vm.vm_name)
-                ws_powered_off.cell(row=row, column=2, value=os_type)
-                ws_powered_off.cell(row=row, column=3, value=vm.cpu_cpus)
-                ws_powered_off.cell(row=row, column=4, value=vm.mem_size_gb).number_format = number_format
-                ws_powered_off.cell(row=row, column=5, value=vm.disk_total_capacity_gb).number_format = number_format
-                ws_powered_off.cell(row=row, column=6, value=vm.powerstate)
-                ws_powered_off.cell(row=row, column=7, value=vm.annotation)
-                row += 1
+            rows = [
+                ([inventory.vm_names[i], os_types[i], cpu_cpus, mem_size_gb, disk_gb, inventory.powerstates[i],
+                  inventory.annotations[i]], styles)
+                for i, cpu_cpus, mem_size_gb, disk_gb in zip(
+                    powered_off_vms.tolist(),
+                    inventory.cpu_cpus[powered_off_vms].tolist(),
+                    inventory.mem_size_gb[powered_off_vms].tolist(),
+                    inventory.disk_total_capacity_gb[powered_off_vms].tolist()
+                )
+            ]
+            write_sheet(ws_powered_off, headers, rows)
         
         # Detailed analysis sheet
         ws_detail = wb.create_sheet("Detailed Analysis")
-        
-        # Detailed headers
         detail_headers = ["VM Name", "Component Type", "Description", "Quantity", "Unit", "Unit Price", "Monthly Cost"]
-        for col, header in enumerate(detail_headers, 1):
-            cell = ws_detail.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        number_cell = cell_template(ws_detail, number_format=number_format)
+        currency_cell = cell_template(ws_detail, number_format=currency_format)
+        line_styles = column_styles([None, None, None, number_cell, None, currency_cell, currency_cell])
+        italic_cell = cell_template(ws_detail, font=Font(italic=True))
+        italic_currency_cell = cell_template(ws_detail, number_format=currency_format, font=Font(italic=True))
+        subtotal_styles = column_styles([italic_cell, None, None, None, None, None, italic_currency_cell])
         
         # Detailed data
-        row = 2
-        for vm_name, summary in sorted_vms:
-            vm_start_row = row
-            for line in summary['bom_lines']:
-                ws_detail.cell(row=row, column=1, value=vm_name)
-                ws_detail.cell(row=row, column=2, value=line.component_type)
-                ws_detail.cell(row=row, column=3, value=line.description)
-                ws_detail.cell(row=row, column=4, value=line.quantity).number_format = number_format
-                ws_detail.cell(row=row, column=5, value=line.unit)
-                ws_detail.cell(row=row, column=6, value=line.unit_price).number_format = currency_format
-                ws_detail.cell(row=row, column=7, value=line.total_cost).number_format = currency_format
-                row += 1
+        components = line_items.component.tolist()
+        quantities = line_items.quantity.tolist()
+        unit_prices = line_items.unit_price.tolist()
+        total_costs = line_items.total_cost.tolist()
+        offsets = line_items.vm_offsets.tolist()
+        rows = []
+        for i in sorted_vms:
+            vm_name = inventory.vm_names[i]
+            start, end = offsets[i], offsets[i + 1]
+            for j in range(start, end):
+                k = components[j]
+                rows.append(([
+                    vm_name,
+                    COMPONENT_TYPES[k],
+                    self.describe_line(inventory, pricing, i, k, quantities[j]),
+                    quantities[j],
+                    COMPONENT_UNITS[k],
+                    unit_prices[j],
+                    total_costs[j],
+                ], line_styles))
             
             # VM subtotal
-            if summary['bom_lines']:
-                ws_detail.cell(row=row, column=1, value=f"{vm_name} Subtotal").font = Font(italic=True)
-                ws_detail.cell(row=row, column=7, value=summary['monthly_cost']).number_format = currency_format
-                ws_detail.cell(row=row, column=7).font = Font(italic=True)
-                row += 1
-                row += 1  # Empty row for separation
+            if end > start:
+                rows.append(([f"{vm_name} Subtotal", None, None, None, None, None, float(pricing.monthly_cost[i])],
+                             subtotal_styles))
+                rows.append(([], []))  # Empty row for separation
+        write_sheet(ws_detail, detail_headers, rows)
         
         # Component breakdown sheet
         ws_components = wb.create_sheet("Component Breakdown")
-        
-        # Component breakdown headers
         comp_headers = ["Component Type", "Monthly Cost", "Percentage"]
-        for col, header in enumerate(comp_headers, 1):
-            cell = ws_components.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        styles = column_styles([None, cell_template(ws_components, number_format=currency_format),
+                                cell_template(ws_components, number_format='0.0%')])
         
         # Component data
-        component_totals = {}
-        for line in all_bom_lines:
-            if line.component_type not in component_totals:
-                component_totals[line.component_type] = 0
-            component_totals[line.component_type] += line.total_cost
-        
-        row = 2
-        for component, cost in sorted(component_totals.items(), key=lambda x: x[1], reverse=True):
+        rows = []
+        for component, cost in analysis.component_totals.items():
             percentage = (cost / total_monthly) * 100
-            ws_components.cell(row=row, column=1, value=component)
-            ws_components.cell(row=row, column=2, value=cost).number_format = currency_format
-            ws_components.cell(row=row, column=3, value=percentage/100).number_format = '0.0%'
-            row += 1
-        
-        # Auto-adjust column widths
-        for ws in wb.worksheets:
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            rows.append(([component, cost, percentage/100], styles))
+        write_sheet(ws_components, comp_headers, rows)
         
         try:
             wb.save(output_file)
@@ -599,22 +888,25 @@ def main():
     generator = VMBOMGenerator(debug=debug_mode)
     
     print(f"Reading VM specifications from: {csv_file}")
-    vm_specs = generator.read_vm_csv(csv_file)
+    inventory = generator.read_vm_csv(csv_file)
     
-    if not vm_specs:
+    if not len(inventory):
         print("No valid VM specifications found.")
         sys.exit(1)
     
-    print(f"\nGenerating cost analysis for {len(vm_specs)} VMs...")
+    print(f"\nGenerating cost analysis for {len(inventory)} VMs...")
+    
+    # Price every VM once; the report and the Excel export share the result
+    analysis = generator._compute_all(inventory)
     
     # Generate and display complete report
-    report = generator.generate_cost_report(vm_specs)
+    report = generator.generate_cost_report(analysis)
     print("\n" + report)
     
     # Export to Excel if requested
     if export_excel:
         output_excel = csv_file.replace('.csv', '_detailed_analysis.xlsx')
-        generator.export_detailed_analysis_to_excel(vm_specs, output_excel)
+        generator.export_detailed_analysis_to_excel(analysis, output_excel)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file